@@ -1,8 +1,23 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
 from typing import List, Optional
 from fractions import Fraction
+import sys
 
-@dataclass
+# 大量に生成されるモデルは__slots__でインスタンスの__dict__を省く
+# （dataclassのslots引数はPython 3.10以降のみ対応）
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# チューニングごとの弦の数（パーサーとレンダラーで共有する）
+STRING_COUNTS = {
+    "guitar": 6,
+    "guitar7": 7,
+    "bass": 4,
+    "bass5": 5,
+    "ukulele": 4
+}
+
+@dataclass(**DATACLASS_SLOTS)
 class Note:
     """音符"""
     string: int  # 弦番号（1〜6）
@@ -28,11 +43,25 @@ class Note:
         if self.triplet_notes is None:
             self.triplet_notes = []
         # フレット番号の正規化
-        if isinstance(self.fret, str) and self.fret.upper() == 'X':
+        if self.fret in ('X', 'x'):
             self.fret = 'x'  # 小文字で統一
             self.is_muted = True
 
-@dataclass
+    def copy(self) -> 'Note':
+        """和音・連符の構成音も含めて音符を複製する
+        
+        Returns:
+            Note: 元の音符と独立した複製
+        """
+        clone = Note(*_NOTE_FIELDS(self))
+        clone.chord_notes = [note.copy() for note in self.chord_notes]
+        clone.triplet_notes = [note.copy() for note in self.triplet_notes]
+        return clone
+
+# Note.copy用: 全フィールドを定義順に取り出す
+_NOTE_FIELDS = attrgetter(*(f.name for f in fields(Note)))
+
+@dataclass(**DATACLASS_SLOTS)
 class Bar:
     """小節"""
     notes: List[Note] = field(default_factory=list)  # 音符のリスト
@@ -53,7 +82,7 @@ class Bar:
         if self.notes is None:
             self.notes = []
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Column:
     bars: List[Bar]
     bars_per_line: int = 4  # この行の小節数
@@ -62,6 +91,7 @@ class Column:
 @dataclass
 class Section:
     """楽譜のセクション"""
+    __slots__ = ('name', 'columns', '_bars', 'is_default', 'bar_group_size', 'page_breaks')
     
     def __init__(self, name: str = ""):
         self.name = name
@@ -107,6 +137,8 @@ class Score:
 
 class BarInfo(dict):
     """小節の構造情報"""
+    __slots__ = ()
+
     def __init__(self, content, repeat_start=False, repeat_end=False, 
                  volta_number=None, volta_start=False, volta_end=False):
         super().__init__({
@@ -1,7 +1,7 @@
 from typing import List, Tuple, Optional, Dict, Union
 from pathlib import Path
 import re
-from ..models import Score, Section, Bar, Note, Column
+from ..models import Score, Section, Bar, Note, Column, STRING_COUNTS
 from ..exceptions import ParseError, TabScriptError
 from fractions import Fraction
 from dataclasses import dataclass
@@ -59,16 +59,14 @@ class Parser:
         self._preprocessor = TextPreprocessor(debug_mode=debug_mode)
         self._analyzer = StructureAnalyzer(debug_mode)
         self._validator = TabScriptValidator()
-        self._score_builder = ScoreBuilder(debug_mode)
+        # analyzerはScoreBuilderと共有する
+        self._score_builder = ScoreBuilder(debug_mode, analyzer=self._analyzer)
         self._bar_builder = BarBuilder(debug_mode)
         
         # 後方互換性のための状態変数
         self.last_string = self._bar_builder.last_string
         self.last_duration = self._bar_builder.last_duration
 
-        # 新しいanalyzerを設定
-        self._score_builder.analyzer = self._analyzer
-
     def debug_print(self, *args, level: int = 1, **kwargs):
         """デバッグ出力を行う
         
@@ -97,7 +95,8 @@ class Parser:
             else:
                 text = text_or_file
             
-            self.debug_print(f"Parsing text: {len(text)} characters")
+            if self.debug_mode:
+                self.debug_print(f"Parsing text: {len(text)} characters")
             
             # テキストの前処理
             preprocessed_text = self._preprocessor.preprocess(text)
@@ -273,28 +272,24 @@ class Parser:
 
     def _get_string_count(self) -> int:
         """チューニング設定から弦の数を取得"""
-        tuning_map = {
-            "guitar": 6,
-            "guitar7": 7,
-            "bass": 4,
-            "bass5": 5,
-            "ukulele": 4
-        }
-        return tuning_map.get(self.score.tuning, 6)  # デフォルトは6弦
+        return STRING_COUNTS.get(self.score.tuning, 6)  # デフォルトは6弦
 
     def safe_int(self, value: str, caller: str) -> int:
         """
         intのラッパー関数。呼び出し元と変換しようとした値をデバッグ出力する
         """
-        self.debug_print(f"\n=== safe_int ===")
-        self.debug_print(f"Called from: {caller}")
-        self.debug_print(f"Converting value: '{value}'")
+        if self.debug_mode:
+            self.debug_print(f"\n=== safe_int ===")
+            self.debug_print(f"Called from: {caller}")
+            self.debug_print(f"Converting value: '{value}'")
         try:
             result = int(value)
-            self.debug_print(f"Result: {result}")
+            if self.debug_mode:
+                self.debug_print(f"Result: {result}")
             return result
         except ValueError:
-            self.debug_print(f"Error converting value: {value}")
+            if self.debug_mode:
+                self.debug_print(f"Error converting value: {value}")
             if caller.endswith("/fret"):
                 raise ParseError("Invalid fret number", self.current_line)
             elif caller.endswith("/string"):
@@ -308,7 +303,8 @@ class Parser:
         Args:
             line: メタデータ行（$key="value"形式）
         """
-        self.debug_print(f"Parsing metadata: {line}")
+        if self.debug_mode:
+            self.debug_print(f"Parsing metadata: {line}")
         
         # $key="value"形式のパース
         match = re.match(r'\$(\w+)\s*=\s*"([^"]*)"', line)
@@ -331,22 +327,24 @@ class Parser:
                 bars_per_line = int(value)
                 # 各セクションのカラムに設定するため、ここでは保存のみ
                 self.bars_per_line = bars_per_line
-                self.debug_print(f"Updated bars_per_line to: {bars_per_line}")
+                if self.debug_mode:
+                    self.debug_print(f"Updated bars_per_line to: {bars_per_line}")
                 # スコアのbars_per_lineも更新
                 self.score.bars_per_line = bars_per_line
-                self.debug_print(f"Updated score.bars_per_line to: {self.score.bars_per_line}")
+                if self.debug_mode:
+                    self.debug_print(f"Updated score.bars_per_line to: {self.score.bars_per_line}")
             except ValueError:
                 raise ParseError(f"Invalid bars_per_line value: {value}", self.current_line)
         else:
             # 未知のメタデータは無視（将来の拡張のため）
-            self.debug_print(f"Unknown metadata key: {key}")
+            if self.debug_mode:
+                self.debug_print(f"Unknown metadata key: {key}")
 
     def _normalize_volta_brackets(self, text: str) -> str:
         """n番カッコを一行形式に変換（互換性のため）"""
         try:
-            # 繰り返し記号の正規化を先に行う
-            text = self._normalize_repeat_brackets(text)
-            return self._preprocessor._normalize_volta_brackets(text)
+            # 繰り返し記号とn番カッコは一度に正規化される
+            return self._preprocessor._normalize_all_brackets(text)
         except ValueError as e:
             # ValueErrorをParseErrorに変換
             raise ParseError(str(e), self.current_line)
@@ -1,7 +1,7 @@
 from typing import List, Optional, Tuple, Dict, Any, Union
 from dataclasses import dataclass
 from tabscript.exceptions import ParseError
-from tabscript.models import BarInfo
+from tabscript.models import BarInfo, DATACLASS_SLOTS
 import re
 
 @dataclass
@@ -31,7 +31,7 @@ class SectionInfo:
     name: str
     content: List[str]
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class BarInfo:
     """小節の構造情報"""
     content: str
@@ -102,44 +102,23 @@ class StructureAnalyzer:
         Raises:
             ParseError: メタデータの形式が不正な場合
         """
-        # $で始まるメタデータ行の処理
-        if line.startswith('$'):
-            # $を除去してキーと値を分離
-            parts = line[1:].split('=', 1)
+        # $または@で始まるメタデータ行の処理（形式は共通）
+        prefix = line[:1]
+        if prefix == '$' or prefix == '@':
+            # 先頭の記号を除去してキーと値を1回の分割で分離
+            key, eq, value = line[1:].partition('=')
             if self.debug_mode:
-                print(f"[DEBUG] _parse_metadata_line: line='{line}' parts={parts}")
-            
-            # $newpageコマンドの特別処理
-            if len(parts) == 1 and parts[0] == 'newpage':
-                return 'newpage', ''
-                
-            if len(parts) != 2:
-                if self.debug_mode:
-                    print(f"[DEBUG] Invalid metadata format: line='{line}' parts={parts}")
-                raise ParseError("Invalid metadata format", self.current_line)
-            key = parts[0].strip()
-            value = parts[1].strip()
+                print(f"[DEBUG] _parse_metadata_line: line='{line}' key='{key}' value='{value}'")
             
-            # 値が引用符で囲まれていることを確認
-            if not (value.startswith('"') and value.endswith('"')):
-                if self.debug_mode:
-                    print(f"[DEBUG] Metadata value not quoted: value='{value}' line='{line}'")
-                raise ParseError("Metadata value must be enclosed in quotes", self.current_line)
-                
-            value = value[1:-1]  # 引用符を除去
-            return key, value
-        
-        # @で始まるメタデータ行の処理
-        if line.startswith('@'):
-            parts = line[1:].split('=', 1)
-            if self.debug_mode:
-                print(f"[DEBUG] _parse_metadata_line: line='{line}' parts={parts}")
-            if len(parts) != 2:
+            if not eq:
+                # $newpageコマンドの特別処理
+                if prefix == '$' and key == 'newpage':
+                    return 'newpage', ''
                 if self.debug_mode:
-                    print(f"[DEBUG] Invalid metadata format: line='{line}' parts={parts}")
+                    print(f"[DEBUG] Invalid metadata format: line='{line}'")
                 raise ParseError("Invalid metadata format", self.current_line)
-            key = parts[0].strip()
-            value = parts[1].strip()
+            key = key.strip()
+            value = value.strip()
             
             # 値が引用符で囲まれていることを確認
             if not (value.startswith('"') and value.endswith('"')):
@@ -17,6 +17,8 @@ class BarBuilder:
         self.debug_mode = debug_mode
         self.current_line = 0
         self.note_builder = NoteBuilder(debug_mode)
+        # 小節内容 -> トークンのタプル
+        self._token_cache = {}
     
     def debug_print(self, *args, **kwargs):
         """デバッグ出力を行う"""
@@ -60,7 +62,8 @@ class BarBuilder:
         Returns:
             Bar: パースされた小節オブジェクト
         """
-        self.debug_print(f"Parsing bar line: {line}")
+        if self.debug_mode:
+            self.debug_print(f"Parsing bar line: {line}")
         
         # 小節オブジェクトを作成
         bar = Bar()
@@ -69,17 +72,12 @@ class BarBuilder:
         if isinstance(line, BarInfo) or (hasattr(line, 'content') and hasattr(line, 'repeat_start')):
             content = line.content
             
-            # BarInfoから繰り返しと小節情報を取得
-            if hasattr(line, 'repeat_start'):
-                bar.is_repeat_start = line.repeat_start
-            if hasattr(line, 'repeat_end'):
-                bar.is_repeat_end = line.repeat_end
-            if hasattr(line, 'volta_number'):
-                bar.volta_number = line.volta_number
-            if hasattr(line, 'volta_start'):
-                bar.volta_start = line.volta_start
-            if hasattr(line, 'volta_end'):
-                bar.volta_end = line.volta_end
+            # BarInfoから繰り返しと小節情報を取得（属性がなければBarの初期値のまま）
+            bar.is_repeat_start = line.repeat_start
+            bar.is_repeat_end = getattr(line, 'repeat_end', bar.is_repeat_end)
+            bar.volta_number = getattr(line, 'volta_number', bar.volta_number)
+            bar.volta_start = getattr(line, 'volta_start', bar.volta_start)
+            bar.volta_end = getattr(line, 'volta_end', bar.volta_end)
         else:
             content = line
         
@@ -98,17 +96,13 @@ class BarBuilder:
             chord_name = chord_parts[0][1:]  # @を除去
             bar.chord = chord_name
         
-        # 音符をパース
+        # 音符をパース（ステップ数は_parse_notes内で計算済み）
         notes = self._parse_notes(content)
-        
+
         # 音符にコード名が設定されていれば、バーにも設定
         if notes and notes[0].chord:
             bar.chord = notes[0].chord
-        
-        # 音符のステップ数を計算
-        for note in notes:
-            self._calculate_note_step(note)
-        
+
         bar.notes = notes
         
         return bar
@@ -130,17 +124,17 @@ class BarBuilder:
         # 音符をパース
         return self.note_builder.parse_note(token, default_duration, chord)
     
-    def _parse_notes(self, content: str) -> List[Note]:
-        """小節内容から音符のリストを生成する
+    def _tokenize(self, content: str) -> List[str]:
+        """小節内容をトークンに分割する
+        
+        トークン分割は直前の音符の状態に依存しないので、結果は内容ごとにキャッシュできる。
         
         Args:
             content: 小節の内容
             
         Returns:
-            List[Note]: 音符のリスト
+            List[str]: トークンのリスト
         """
-        notes = []
-        
         # 和音トークンを正しく抽出するための正規表現パターン
         # 括弧内のすべてを1つのトークンとして扱う
         tokens = []
@@ -202,8 +196,26 @@ class BarBuilder:
             token = content[token_start:current_pos]
             if token:
                 tokens.append(token)
+        return tokens
+    
+    def _parse_notes(self, content: str) -> List[Note]:
+        """小節内容から音符のリストを生成する
+        
+        Args:
+            content: 小節の内容
+            
+        Returns:
+            List[Note]: 音符のリスト
+        """
+        notes = []
         
-        self.debug_print(f"[DEBUG] tokens after split: {tokens}")
+        # トークンに分割（同じ内容はキャッシュを使う）
+        tokens = self._token_cache.get(content)
+        if tokens is None:
+            tokens = self._token_cache[content] = tuple(self._tokenize(content))
+        
+        if self.debug_mode:
+            self.debug_print(f"[DEBUG] tokens after split: {tokens}")
         # コード名と音価の初期設定
         current_chord = None
         current_duration = "4"
@@ -220,14 +232,16 @@ class BarBuilder:
             try:
                 # 連符グループの処理
                 if token.startswith('[tuplet:'):
-                    m = re.match(r'\[tuplet:(\d+)\](.*)', token)
-                    if not m:
+                    # 接頭辞は確定しているので正規表現を使わずに切り出す
+                    try:
+                        close = token.index(']')
+                        tuplet_type = int(token[8:close])  # len('[tuplet:') == 8
+                    except ValueError:
                         raise ParseError("連符グループのパースに失敗しました", self.current_line)
-                    tuplet_type = int(m.group(1))
-                    tuplet_content = m.group(2)
-                    tuplet_notes = []
+                    tuplet_content = token[close + 1:]
                     tuplet_tokens = tuplet_content.split()
-                    self.debug_print(f"最初のトークン: {tuplet_tokens[0] if tuplet_tokens else 'なし'}")
+                    if self.debug_mode:
+                        self.debug_print(f"最初のトークン: {tuplet_tokens[0] if tuplet_tokens else 'なし'}")
                     # 最初のトークンで音価を決定（休符も考慮）
                     if tuplet_tokens:
                         parts = tuplet_tokens[0].split(':', 1)
@@ -236,20 +250,25 @@ class BarBuilder:
                         tuplet_duration = "4"
                     is_first_note = True
                     for note_token in tuplet_tokens:
-                        # 休符トークンがrで始まり:を含まない場合、r:XXの形に変換
-                        if note_token.startswith('r') and ':' not in note_token and len(note_token) > 1:
-                            note_token = f"r:{note_token[1:]}"
-                        split_result = note_token.split(':', 1)
-                        self.debug_print(f"分割: note_token={note_token}, split_result={split_result}")
-                        duration_for_note = split_result[1] if len(split_result) > 1 else tuplet_duration
-                        self.debug_print(f"連符: note_token={note_token}, duration_for_note={duration_for_note}")
+                        # 音価の切り出しを1回のfindで済ませる
+                        colon = note_token.find(':')
+                        if colon == -1:
+                            # 休符トークンがrで始まり:を含まない場合、r:XXの形に変換
+                            if note_token[:1] == 'r' and len(note_token) > 1:
+                                duration_for_note = note_token[1:]
+                                note_token = 'r:' + duration_for_note
+                            else:
+                                duration_for_note = tuplet_duration
+                        else:
+                            duration_for_note = note_token[colon + 1:]
+                        if self.debug_mode:
+                            self.debug_print(f"連符: note_token={note_token}, duration_for_note={duration_for_note}")
                         is_start = is_first_note and chord_just_set
                         note = self.note_builder.parse_note(note_token, duration_for_note, current_chord, is_chord_start=is_start)
                         note.tuplet = tuplet_type
-                        tuplet_notes.append(note)
+                        notes.append(note)
                         is_first_note = False
                     chord_just_set = False  # コード設定フラグをリセット
-                    notes.extend(tuplet_notes)
                     continue
                 
                 # 和音表記の場合
@@ -258,7 +277,7 @@ class BarBuilder:
                     chord_just_set = False  # コード設定フラグをリセット
                     
                     # 音価を更新（次の音符のデフォルト値として）
-                    if hasattr(chord_note, 'duration') and chord_note.duration:
+                    if chord_note.duration:
                         current_duration = chord_note.duration
                     
                     # 和音は単一のNoteオブジェクトとして追加
@@ -269,7 +288,7 @@ class BarBuilder:
                     chord_just_set = False  # コード設定フラグをリセット
                     
                     # 音価を更新（次の音符のデフォルト値として）
-                    if hasattr(note, 'duration') and note.duration:
+                    if note.duration:
                         current_duration = note.duration
                     
                     # 音符をリストに追加
@@ -281,7 +300,8 @@ class BarBuilder:
         # 音符ごとにステップ数を計算
         for note in notes:
             self.note_builder.calculate_note_step(note)
-        self.debug_print(f"[DEBUG] notes before return: {[getattr(n, 'tuplet', None) for n in notes]}")
+        if self.debug_mode:
+            self.debug_print(f"[DEBUG] notes before return: {[getattr(n, 'tuplet', None) for n in notes]}")
         return notes
     
     def _calculate_note_step(self, note: Note) -> None:
@@ -1,8 +1,16 @@
 from fractions import Fraction
 from typing import List, Optional, Dict, Tuple
-from ...models import Note, Bar
+from ...models import Note, Bar, STRING_COUNTS
 from ...exceptions import ParseError
 import re
+import sys
+
+# 音価から除去するタイ/スラーの記号
+_STEP_STRIP = str.maketrans('', '', '~()')
+
+# (音価, 連符の種類) -> ステップ数 のキャッシュ
+# 組み合わせは少なく、Fractionは不変なので音符間で共有してよい
+_STEP_CACHE: Dict[Tuple[str, Optional[int]], Fraction] = {}
 
 class NoteBuilder:
     """音符レベルの処理を担当するクラス"""
@@ -44,7 +52,8 @@ class NoteBuilder:
         Returns:
             Note: パースされた音符オブジェクト
         """
-        self.debug_print(f"parse_note: token='{token}', default_duration='{default_duration}', chord='{chord}'")
+        if self.debug_mode:
+            self.debug_print(f"parse_note: token='{token}', default_duration='{default_duration}', chord='{chord}'")
         
         # 繰り返し記号や n番括弧の場合はエラー
         if token in ['{', '}'] or re.match(r'^\{\d+$', token) or re.match(r'^\d+\}$', token):
@@ -57,7 +66,7 @@ class NoteBuilder:
         # 休符の処理
         if token.startswith('r'):
             # 休符を直接ここで処理
-            parts = token.split(':')
+            parts = token.split(':', 1)
             duration = parts[1] if len(parts) > 1 else default_duration
             
             # 音符は次の音符と接続されるか？
@@ -70,7 +79,10 @@ class NoteBuilder:
             if not duration.isdigit():
                 raise ParseError(f"休符の音価は数字である必要があります: {duration}", self.current_line)
             
-            self.debug_print(f"Creating rest note with is_chord_start={is_chord_start}")
+            # 音価は種類が少ないのでinternして同じ文字列を共有する
+            duration = sys.intern(duration)
+            if self.debug_mode:
+                self.debug_print(f"Creating rest note with is_chord_start={is_chord_start}")
             note = Note(
                 string=self.last_string,  # 前回の弦番号を継承
                 fret="0",
@@ -82,7 +94,8 @@ class NoteBuilder:
             )
             
             self.last_duration = duration
-            self.debug_print(f"Created rest note: duration={duration}, is_chord_start={note.is_chord_start}, chord={note.chord}")
+            if self.debug_mode:
+                self.debug_print(f"Created rest note: duration={duration}, is_chord_start={note.is_chord_start}, chord={note.chord}")
             return note
         
         # 和音の処理
@@ -93,8 +106,10 @@ class NoteBuilder:
         if token.startswith('u') or token.startswith('d'):
             # 弦移動を処理
             is_up = token.startswith('u')
+            parts = token.split(':', 1)
+            duration = parts[1] if len(parts) > 1 else default_duration
             # フレット番号を抽出（u/dの後の数字はフレット番号）
-            fret_str = token[1:].split(':')[0]
+            fret_str = parts[0][1:]
             
             # フレットからも &を削除（もし含まれていたら）
             connect_next = False
@@ -102,9 +117,6 @@ class NoteBuilder:
                 connect_next = True
                 fret_str = fret_str[:-1]
             
-            parts = token.split(':')
-            duration = parts[1] if len(parts) > 1 else default_duration
-            
             # 音価からも &を削除
             if duration.endswith('&'):
                 connect_next = True
@@ -118,18 +130,15 @@ class NoteBuilder:
                 raise ParseError(f"cannot move above string 1", self.current_line)
             
             # チューニングに基づいて最大弦数を取得
-            max_string = 6  # デフォルトは6弦ギター
-            if self.tuning == "guitar7":
-                max_string = 7
-            elif self.tuning in ["bass", "ukulele"]:
-                max_string = 4
-            elif self.tuning == "bass5":
-                max_string = 5
+            max_string = self.get_string_count()
             
             if new_string > max_string:
                 raise ParseError(f"cannot move beyond string {max_string}", self.current_line)
             
-            self.debug_print(f"Creating string movement note with is_chord_start={is_chord_start}")
+            fret_str = sys.intern(fret_str)
+            duration = sys.intern(duration)
+            if self.debug_mode:
+                self.debug_print(f"Creating string movement note with is_chord_start={is_chord_start}")
             note = Note(
                 string=new_string,
                 fret=fret_str,
@@ -143,12 +152,30 @@ class NoteBuilder:
             
             self.last_string = new_string
             self.last_duration = duration
-            self.debug_print(f"Created string movement note: string={new_string}, fret={fret_str}, duration={duration}, is_chord_start={note.is_chord_start}")
+            if self.debug_mode:
+                self.debug_print(f"Created string movement note: string={new_string}, fret={fret_str}, duration={duration}, is_chord_start={note.is_chord_start}")
             
             return note
         
         # 通常の音符パース
-        parts = token.split(':')
+        return self._parse_plain_note(token, default_duration, chord, is_chord_start)
+    
+    def _parse_plain_note(self, token: str, default_duration: str, chord: Optional[str] = None, is_chord_start: bool = False) -> Note:
+        """通常の音符トークン（弦-フレット:音価）をパースする
+        
+        parse_noteの休符・和音・弦移動の振り分けを経由しない高速パス。
+        和音の構成音のパースにも使用する。
+        
+        Args:
+            token: パースする音符トークン（例：3-5:8）
+            default_duration: デフォルトの音価（Noneは不可）
+            chord: コード名
+            is_chord_start: コード開始フラグ
+            
+        Returns:
+            Note: パースされた音符オブジェクト
+        """
+        parts = token.split(':', 1)
         string_fret = parts[0]
         
         # `string-fret` 部分を処理
@@ -176,16 +203,22 @@ class NoteBuilder:
             duration = duration.rstrip('&')
         
         # ミュート音符の処理（X または x）
-        if fret_str.upper() == 'X':
+        if fret_str in ('X', 'x'):
             is_muted = True
             fret_str = 'x'  # 小文字で統一
         else:
             is_muted = False
         
+        # フレットと音価は同じ値が繰り返し現れるのでinternして共有する
+        fret_str = sys.intern(fret_str)
+        duration = sys.intern(duration)
+        
         # デバッグ出力を追加して、&が正しく除去されていることを確認
-        self.debug_print(f"After parsing: string={string_num}, fret={fret_str}, duration={duration}, connect_next={connect_next}")
+        if self.debug_mode:
+            self.debug_print(f"After parsing: string={string_num}, fret={fret_str}, duration={duration}, connect_next={connect_next}")
         
-        self.debug_print(f"Creating regular note with is_chord_start={is_chord_start}")
+        if self.debug_mode:
+            self.debug_print(f"Creating regular note with is_chord_start={is_chord_start}")
         note = Note(
             string=string_num,
             fret=fret_str,
@@ -196,7 +229,8 @@ class NoteBuilder:
             is_chord_start=is_chord_start
         )
         
-        self.debug_print(f"Created note: string={string_num}, fret={fret_str}, duration={duration}, is_chord_start={note.is_chord_start}")
+        if self.debug_mode:
+            self.debug_print(f"Created note: string={string_num}, fret={fret_str}, duration={duration}, is_chord_start={note.is_chord_start}")
         
         self.last_string = string_num
         self.last_duration = duration
@@ -205,7 +239,8 @@ class NoteBuilder:
     
     def parse_chord_notation(self, token: str, default_duration: str = None, chord: Optional[str] = None, is_chord_start: bool = False) -> Note:
         """和音表記（括弧で囲まれた複数の音符）をパースする"""
-        self.debug_print(f"parse_chord_notation: token='{token}', default_duration='{default_duration}', chord='{chord}', is_chord_start={is_chord_start}")
+        if self.debug_mode:
+            self.debug_print(f"parse_chord_notation: token='{token}', default_duration='{default_duration}', chord='{chord}', is_chord_start={is_chord_start}")
         
         # 括弧と音価の分離
         if token.startswith('(') and ')' in token:
@@ -234,10 +269,20 @@ class NoteBuilder:
             if not notes_tokens:
                 raise ValueError(f"Empty chord notation: {token}")
             
-            self.debug_print(f"Chord content: {content_part}, notes_tokens: {notes_tokens}, duration: {duration}")
+            if self.debug_mode:
+                self.debug_print(f"Chord content: {content_part}, notes_tokens: {notes_tokens}, duration: {duration}")
+            
+            # デフォルト音価が指定されていない場合は前回の音価を使用
+            if duration is None:
+                duration = self.last_duration
+            
+            # 構成音は通常の音符のみ（休符・和音・弦移動は不可）
+            for note_token in notes_tokens:
+                if note_token[0] in '(rud':
+                    raise ParseError(f"和音の構成音として解析できません: {note_token}", self.current_line)
             
             # 最初の音符を主音として処理
-            main_note = self.parse_note(notes_tokens[0], duration, chord, is_chord_start=True)  # 常にTrueに設定
+            main_note = self._parse_plain_note(notes_tokens[0], duration, chord, is_chord_start=True)  # 常にTrueに設定
             
             # 和音フラグと接続フラグの設定
             main_note.is_chord = True
@@ -247,17 +292,19 @@ class NoteBuilder:
             if connect_next:
                 main_note.connect_next = True
             
-            self.debug_print(f"Created chord note: string={main_note.string}, fret={main_note.fret}, duration={duration}, is_chord_start={main_note.is_chord_start}")
+            if self.debug_mode:
+                self.debug_print(f"Created chord note: string={main_note.string}, fret={main_note.fret}, duration={duration}, is_chord_start={main_note.is_chord_start}")
             
             # 残りの音符を和音の構成音として追加
             for note_token in notes_tokens[1:]:
-                chord_note = self.parse_note(note_token, duration, chord, is_chord_start=False)  # 明示的にFalseを設定
+                chord_note = self._parse_plain_note(note_token, duration, chord, is_chord_start=False)  # 明示的にFalseを設定
                 chord_note.is_chord = True
                 if connect_next:
                     chord_note.connect_next = True
                 main_note.chord_notes.append(chord_note)
             
-            self.debug_print(f"Created chord with {len(main_note.chord_notes)} additional notes")
+            if self.debug_mode:
+                self.debug_print(f"Created chord with {len(main_note.chord_notes)} additional notes")
             return main_note
         else:
             raise ValueError(f"Invalid chord notation format: {token}")
@@ -268,41 +315,33 @@ class NoteBuilder:
         Args:
             note: ステップ数を計算する音符オブジェクト
         """
-        # 音価を解析
-        duration = note.duration
+        key = (note.duration, note.tuplet)
+        step = _STEP_CACHE.get(key)
+        if step is not None:
+            note.step = step
+            return
         
-        # タイ/スラーの記号を除去
-        if '~' in duration:
-            duration = duration.replace('~', '')
-        if '(' in duration:
-            duration = duration.replace('(', '')
-        if ')' in duration:
-            duration = duration.replace(')', '')
+        # 音価を解析（タイ/スラーの記号を除去）
+        duration = note.duration.translate(_STEP_STRIP)
         
+        # 分子・分母を整数で持ち回り、最後に一度だけFractionを生成する
         # 付点の処理
         if duration.endswith('.'):
-            base = int(duration[:-1])
-            # 付点音符は基本の音価の1.5倍
-            step = Fraction(4, base) * Fraction(3, 2)
+            # 付点音符は基本の音価の1.5倍: 4/base * 3/2
+            num = 12
+            den = int(duration[:-1]) * 2
         else:
-            base = int(duration)
-            step = Fraction(4, base)
+            num = 4
+            den = int(duration)
         
         # 連符スケールの適用
         if note.tuplet is not None:
             n = note.tuplet
             # 三連符: 2/3, 五連符: 4/5, 七連符: 6/7 ...
-            step = step * Fraction(n - 1, n)
-            if n == 3:
-                step = step * Fraction(2, 3)
-            elif n == 5:
-                step = step * Fraction(4, 5)
-            elif n == 7:
-                step = step * Fraction(6, 7)
-            # それ以外は一般化
-            else:
-                step = step * Fraction(n - 1, n)
-        note.step = step
+            # （従来どおり(n-1)/nを2回掛ける）
+            num *= (n - 1) * (n - 1)
+            den *= n * n
+        note.step = _STEP_CACHE[key] = Fraction(num, den)
     
     def get_string_count(self) -> int:
         """チューニング設定から弦の数を取得
@@ -310,14 +349,7 @@ class NoteBuilder:
         Returns:
             int: 弦の数
         """
-        tuning_map = {
-            "guitar": 6,
-            "guitar7": 7,
-            "bass": 4,
-            "bass5": 5,
-            "ukulele": 4
-        }
-        return tuning_map.get(self.tuning, 6)  # デフォルトは6弦 
+        return STRING_COUNTS.get(self.tuning, 6)  # デフォルトは6弦
 
     def parse_bar_line(self, line):
         """小節行を解析してBarオブジェクトを返す"""
@@ -327,7 +359,8 @@ class NoteBuilder:
         # コード名の直後にスペースがなければ補う（和音や連符の前も含めて）
         line = re.sub(r'(@[A-Za-z0-9#\-/]+)(?=[(\[]|\S)', r'\1 ', line)
         tokens = re.findall(r'\S+', line)
-        self.debug_print(f"[TOKENS] {tokens}")
+        if self.debug_mode:
+            self.debug_print(f"[TOKENS] {tokens}")
         
         # コード名と音価の初期設定
         current_chord = None
@@ -336,24 +369,28 @@ class NoteBuilder:
         
         # 各トークンを解析
         for token in tokens:
-            self.debug_print(f"[LOOP HEAD] token='{token}', chord_just_set={chord_just_set}, current_chord={current_chord}")
+            if self.debug_mode:
+                self.debug_print(f"[LOOP HEAD] token='{token}', chord_just_set={chord_just_set}, current_chord={current_chord}")
             # コード名の処理
             if token.startswith('@'):
                 current_chord = token[1:]
                 chord_just_set = True
-                self.debug_print(f"[DEBUG] chord_just_setをTrueにセット: token={token}, current_chord={current_chord}")
+                if self.debug_mode:
+                    self.debug_print(f"[DEBUG] chord_just_setをTrueにセット: token={token}, current_chord={current_chord}")
                 continue
             
             try:
                 # 連符グループの処理
                 if token.startswith('[tuplet:'):
-                    self.debug_print(f"[DEBUG] 連符グループ処理直前: chord_just_set={chord_just_set}, token={token}")
-                    m = re.match(r'\[tuplet:(\d+)\](.*)', token)
-                    if not m:
+                    if self.debug_mode:
+                        self.debug_print(f"[DEBUG] 連符グループ処理直前: chord_just_set={chord_just_set}, token={token}")
+                    # 接頭辞は確定しているので正規表現を使わずに切り出す
+                    try:
+                        close = token.index(']')
+                        tuplet_type = int(token[8:close])  # len('[tuplet:') == 8
+                    except ValueError:
                         raise ParseError("連符グループのパースに失敗しました", self.current_line)
-                    tuplet_type = int(m.group(1))
-                    tuplet_content = m.group(2)
-                    tuplet_notes = []
+                    tuplet_content = token[close + 1:]
                     tuplet_tokens = tuplet_content.split()
                     if tuplet_tokens:
                         parts = tuplet_tokens[0].split(':', 1)
@@ -365,25 +402,30 @@ class NoteBuilder:
                     chord_just_set = False
                     is_first_note = True
                     for note_token in tuplet_tokens:
-                        if note_token.startswith('r') and ':' not in note_token and len(note_token) > 1:
-                            note_token = f"r:{note_token[1:]}"
-                        split_result = note_token.split(':', 1)
-                        duration_for_note = split_result[1] if len(split_result) > 1 else tuplet_duration
+                        # 音価の切り出しを1回のfindで済ませる
+                        colon = note_token.find(':')
+                        if colon == -1:
+                            if note_token[:1] == 'r' and len(note_token) > 1:
+                                duration_for_note = note_token[1:]
+                                note_token = 'r:' + duration_for_note
+                            else:
+                                duration_for_note = tuplet_duration
+                        else:
+                            duration_for_note = note_token[colon + 1:]
                         is_start = is_first_note and consume_chord_just_set
-                        if is_start:
+                        if is_start and self.debug_mode:
                             self.debug_print(f"[DEBUG] 連符: is_chord_start=True で note_token={note_token} をparse_noteに渡す (consume_chord_just_set={consume_chord_just_set})")
                         note = self.parse_note(note_token, duration_for_note, current_chord, is_chord_start=is_start)
                         note.tuplet = tuplet_type
-                        tuplet_notes.append(note)
+                        bar.notes.append(note)
                         is_first_note = False
-                    bar.notes.extend(tuplet_notes)
                     continue
                 
                 # 和音表記の場合
                 if token.startswith('(') and ')' in token:
                     consume_chord_just_set = chord_just_set
                     chord_just_set = False
-                    if consume_chord_just_set:
+                    if consume_chord_just_set and self.debug_mode:
                         self.debug_print(f"[DEBUG] 和音: is_chord_start=True で token={token} をparse_chord_notationに渡す")
                     chord_note = self.parse_chord_notation(token, current_duration, current_chord, is_chord_start=True)
                     if chord_note.duration:
@@ -395,11 +437,13 @@ class NoteBuilder:
                 consume_chord_just_set = chord_just_set
                 chord_just_set = False
                 if consume_chord_just_set:
-                    self.debug_print(f"[DEBUG] 通常音符: is_chord_start=True で token={token} をparse_noteに渡す")
+                    if self.debug_mode:
+                        self.debug_print(f"[DEBUG] 通常音符: is_chord_start=True で token={token} をparse_noteに渡す")
                     note = self.parse_note(token, current_duration, current_chord, is_chord_start=True)
                 else:
                     note = self.parse_note(token, current_duration, current_chord, is_chord_start=False)
-                self.debug_print(f"parse_bar_line: set is_chord_start={note.is_chord_start} for note string={note.string}, fret={note.fret}, chord={note.chord}")
+                if self.debug_mode:
+                    self.debug_print(f"parse_bar_line: set is_chord_start={note.is_chord_start} for note string={note.string}, fret={note.fret}, chord={note.chord}")
                 if note.duration:
                     current_duration = note.duration
                 bar.notes.append(note)
@@ -411,15 +455,16 @@ class NoteBuilder:
 
     def build_note(self, string, fret, duration):
         """通常の音符を構築する"""
-        return Note(string=string, fret=fret, duration=duration, is_rest=False, is_muted=False, is_chord=False, is_chord_start=False, is_triplet=False, triplet_notes=[], connect_next=False, is_up_move=False, is_down_move=False)
+        # フラグ類はNoteの既定値と同じなので位置引数のみで生成する
+        return Note(string, fret, duration)
 
     def build_rest(self, duration):
         """休符を構築する"""
-        return Note(string=None, fret="r", duration=duration, is_rest=True, is_muted=False, is_chord=False, is_chord_start=False, is_triplet=False, triplet_notes=[], connect_next=False, is_up_move=False, is_down_move=False)
+        return Note(None, "r", duration, is_rest=True)
 
     def build_muted(self, string, duration):
         """ミュート音符を構築する"""
-        return Note(string=string, fret="x", duration=duration, is_rest=False, is_muted=True, is_chord=False, is_chord_start=False, is_triplet=False, triplet_notes=[], connect_next=False, is_up_move=False, is_down_move=False)
+        return Note(string, "x", duration, is_muted=True)
 
     def build_tuplet(self, notes, duration, tuplet_type):
         """任意連符グループを構築する（durationは各音符の値を維持）"""
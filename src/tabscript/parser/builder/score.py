@@ -2,24 +2,35 @@ from typing import Dict, List, Any, Tuple, Optional
 from ...models import Score, Section, Column, Bar, Note, BarInfo
 from ...exceptions import ParseError, TabScriptError
 from .bar import BarBuilder
-import re
 from ..analyzer import StructureAnalyzer  # 循環インポートを避けるためにここでインポート
 # from ..analyzer.note import NoteAnalyzer  # この行を削除または以下のようにコメントアウト
 from fractions import Fraction
+from operator import attrgetter
+import re
+
+# _build_bar用: BarInfoの繰り返し・n番括弧の情報を1回の呼び出しで取り出す
+_BAR_INFO_FLAGS = attrgetter('repeat_start', 'repeat_end', 'volta_number', 'volta_start', 'volta_end')
+
+# メタデータのキー（英数字とアンダースコア）
+_RE_METADATA_KEY = re.compile(r'\w+')
 
 class ScoreBuilder:
     """スコアレベルの処理を担当するクラス"""
     
-    def __init__(self, debug_mode: bool = False):
+    def __init__(self, debug_mode: bool = False, analyzer: Optional[StructureAnalyzer] = None):
         """ScoreBuilderを初期化
         
         Args:
             debug_mode: デバッグモードの有効/無効
+            analyzer: 共有するStructureAnalyzer（省略時は新しく作成）
         """
         self.debug_mode = debug_mode
         self.current_line = 0
         self.bar_builder = BarBuilder(debug_mode)
-        self.analyzer = StructureAnalyzer(debug_mode)
+        self.analyzer = analyzer if analyzer is not None else StructureAnalyzer(debug_mode)
+        # 小節内容のパース結果キャッシュ
+        # (内容, 直前の弦, 直前の音価, チューニング) -> (音符リスト, パース後の弦, パース後の音価)
+        self._bar_cache = {}
         # 後方互換性のための状態変数
         self.last_string = self.bar_builder.last_string
         self.last_duration = self.bar_builder.last_duration
@@ -46,71 +57,70 @@ class ScoreBuilder:
             beat=settings.get('beat', '4/4'),
             bars_per_line=int(settings.get('bars_per_line', 4))
         )
-        self.debug_print(f"Initial bars_per_line: {score.bars_per_line}")
+        if self.debug_mode:
+            self.debug_print(f"Initial bars_per_line: {score.bars_per_line}")
+        # 前回のスコアの状態やキャッシュは持ち越さない
+        self.reset()
         
         # 各セクションのバーを作成
         current_beat = score.beat
         current_bars_per_line = score.bars_per_line
         
-        # section_bar_infosの形式を検出して適切に処理
-        if isinstance(section_bar_infos, list):
-            # リスト形式 [{"name": "Section A", "bars": [...]}, ...]
-            for section_info in section_bar_infos:
-                section_name = section_info.get('name', '')
-                bar_infos = section_info.get('bars', [])
-                
-                # セクションごとのbars_per_lineを取得
-                section_bars_per_line = section_info.get('bars_per_line', current_bars_per_line)
-                self.debug_print(f"Section {section_name} using bars_per_line: {section_bars_per_line}")
-                
-                section = Section(section_name)
-                # page_breaks情報を引き継ぐ
-                if 'page_breaks' in section_info:
-                    section.page_breaks = section_info['page_breaks']
-                score.sections.append(section)
-                
-                # 小節の作成
-                bars = []
-                for bar_info in bar_infos:
-                    bar = self._build_bar(bar_info, current_beat)
-                    bars.append(bar)
-                    # 拍子が変わったら記録
-                    if bar.beat != current_beat:
-                        current_beat = bar.beat
-                # 小節リストをbars_per_line単位でColumnに分割
-                self.debug_print(f"Organizing bars for section {section_name} with bars_per_line={section_bars_per_line}")
-                self._organize_bars_into_columns(section, bars, section_bars_per_line, current_beat)
-                # 追加: Sectionの_bars属性に全小節をセット
-                section._bars = bars
-        else:
+        # section_bar_infosの形式を正規化（辞書形式はリスト形式に変換）
+        if isinstance(section_bar_infos, dict):
             # 辞書形式 {"Section A": [...], ...}
-            for section_name, bar_infos in section_bar_infos.items():
-                # セクションごとのbars_per_lineを取得
-                section_bars_per_line = bar_infos.get('bars_per_line', current_bars_per_line)
+            # 中間リストは作らずジェネレータで1セクションずつ変換する
+            section_bar_infos = (
+                {"name": section_name, "bars": bar_infos}
+                for section_name, bar_infos in section_bar_infos.items()
+            )
+        
+        # リスト形式 [{"name": "Section A", "bars": [...]}, ...]
+        for section_info in section_bar_infos:
+            section_name = section_info.get('name', '')
+            bar_infos = section_info.get('bars', [])
+            
+            # セクションごとのbars_per_lineを取得
+            section_bars_per_line = section_info.get('bars_per_line', current_bars_per_line)
+            if self.debug_mode:
                 self.debug_print(f"Section {section_name} using bars_per_line: {section_bars_per_line}")
-                
-                section = Section(section_name)
-                # page_breaks情報を引き継ぐ
-                if 'page_breaks' in bar_infos:
-                    section.page_breaks = bar_infos['page_breaks']
-                score.sections.append(section)
-                
-                # 小節の作成
-                bars = []
-                for bar_info in bar_infos:
-                    bar = self._build_bar(bar_info, current_beat)
-                    bars.append(bar)
-                    # 拍子が変わったら記録
-                    if bar.beat != current_beat:
-                        current_beat = bar.beat
-                # 小節リストをbars_per_line単位でColumnに分割
+            
+            section = Section(section_name)
+            # page_breaks情報を引き継ぐ
+            if 'page_breaks' in section_info:
+                section.page_breaks = section_info['page_breaks']
+            score.sections.append(section)
+            
+            # 小節の作成
+            # （_build_barは渡した拍子をそのまま小節に設定するので、
+            #   セクション内で拍子が変わることはない）
+            build_bar = self._build_bar
+            bars = [build_bar(bar_info, current_beat) for bar_info in bar_infos]
+            # 拍子が変わったら記録
+            if bars:
+                current_beat = bars[-1].beat
+            # 小節リストをbars_per_line単位でColumnに分割
+            if self.debug_mode:
                 self.debug_print(f"Organizing bars for section {section_name} with bars_per_line={section_bars_per_line}")
-                self._organize_bars_into_columns(section, bars, section_bars_per_line, current_beat)
-                # 追加: Sectionの_bars属性に全小節をセット
-                section._bars = bars
+            self._organize_bars_into_columns(section, bars, section_bars_per_line, current_beat)
+            # 追加: Sectionの_bars属性に全小節をセット
+            section._bars = bars
         
         return score
     
+    def reset(self) -> None:
+        """パースごとの状態をリセットする
+        
+        同じScoreBuilderで複数のスコアを構築しても、前のスコアの
+        直前の弦・音価やキャッシュが次のスコアに影響しないようにする。
+        """
+        self.current_line = 0
+        self.bar_builder.current_line = 0
+        self.bar_builder.last_string = 1
+        self.bar_builder.last_duration = "4"
+        self._bar_cache.clear()
+        self.bar_builder._token_cache.clear()
+    
     def _organize_bars_into_columns(self, section, bars, bars_per_line, beat):
         """小節リストをColumnに整理する
         
@@ -123,14 +133,12 @@ class ScoreBuilder:
         if not bars:
             return
         
-        # 小節を bars_per_line ごとに分割
-        for i in range(0, len(bars), bars_per_line):
-            # bars_per_line 個または残りすべてを取得
-            chunk = bars[i:i+bars_per_line]
-            
-            # 新しいカラムを作成して追加
-            column = Column(bars=chunk, bars_per_line=bars_per_line, beat=beat)
-            section.columns.append(column)
+        # 小節を bars_per_line ごとに分割してカラムを追加
+        # （Columnは位置引数で生成してキーワード引数の処理を省く）
+        section.columns.extend(
+            Column(bars[i:i+bars_per_line], bars_per_line, beat)
+            for i in range(0, len(bars), bars_per_line)
+        )
     
     def parse_metadata_line(self, line: str) -> Tuple[str, str]:
         """メタデータ行をパースする
@@ -141,10 +149,19 @@ class ScoreBuilder:
         Returns:
             Tuple[str, str]: キーと値のペア
         """
-        match = re.match(r'\$(\w+)\s*=\s*"([^"]*)"', line)
-        if not match:
+        # $key = "value" の固定形式なので正規表現を使わずに分解する
+        if not line.startswith('$'):
             raise ParseError("Invalid metadata format", self.current_line)
-        return match.group(1), match.group(2)
+        key, _, rest = line[1:].partition('=')
+        key = key.rstrip()
+        rest = rest.lstrip()
+        # キーは英数字とアンダースコアのみ、値はダブルクォートで囲む
+        if not _RE_METADATA_KEY.fullmatch(key) or not rest.startswith('"'):
+            raise ParseError("Invalid metadata format", self.current_line)
+        end = rest.find('"', 1)
+        if end == -1:
+            raise ParseError("Invalid metadata format", self.current_line)
+        return key, rest[1:end]
     
     def parse_section_header(self, line: str) -> Section:
         """セクションヘッダーをパースする
@@ -155,11 +172,12 @@ class ScoreBuilder:
         Returns:
             Section: 作成されたセクションオブジェクト
         """
-        match = re.match(r'\[(.*)\]', line)
-        if not match:
+        # 先頭の[から最後の]までをセクション名とする
+        close = line.rfind(']')
+        if not line.startswith('[') or close == -1:
             raise ParseError("Invalid section header", self.current_line)
         
-        name = match.group(1)
+        name = line[1:close]
         return Section(name=name)
     
     def parse_lines(self, lines):
@@ -171,20 +189,27 @@ class ScoreBuilder:
         Returns:
             Score: パースされたスコアオブジェクト
         """
-        self.debug_print(f"Parsing {len(lines)} lines")
+        if self.debug_mode:
+            self.debug_print(f"Parsing {len(lines)} lines")
         score = Score()
         current_section = None
+        # 小節は現在のカラムに直接追加し、bars_per_lineに達したら次のカラムを作る
         current_column = None
-        current_bars = []
         current_bars_per_line = 4  # デフォルト値
         current_beat = '4/4'
 
+        parse_metadata_line = self.parse_metadata_line
+        parse_bar_line = self.parse_bar_line
         for line in lines:
-            self.debug_print(f"Parsing line: {line}")
-            if not line.strip():
+            if self.debug_mode:
+                self.debug_print(f"Parsing line: {line}")
+            # 空行はコピーを作らずに判定する
+            if not line or line.isspace():
                 continue
-            if line.startswith('$'):
-                key, value = self.parse_metadata_line(line)
+            # 行頭の1文字で行の種類を振り分ける
+            first = line[0]
+            if first == '$':
+                key, value = parse_metadata_line(line)
                 if key == 'title':
                     score.title = value
                 elif key == 'tuning':
@@ -192,26 +217,24 @@ class ScoreBuilder:
                 elif key == 'beat':
                     score.beat = value
                     current_beat = value
+                    # 次の小節が入るカラムの拍子だけを更新する
+                    # （埋まったカラムは確定済みなので、次の小節から新しいカラムにする）
+                    if current_column is not None:
+                        if len(current_column.bars) < current_bars_per_line:
+                            current_column.beat = value
+                        else:
+                            current_column = None
                 elif key == 'bars_per_line':
                     # bars_per_line切り替え時は強制的にカラムを区切る
-                    if current_section and current_bars:
-                        # 直前のbars_per_lineでカラム分割
-                        self._organize_bars_into_columns(current_section, current_bars, current_bars_per_line, current_beat)
-                        current_bars = []
+                    current_column = None
                     current_bars_per_line = int(value)
                     score.bars_per_line = current_bars_per_line
                 elif key == 'section':
-                    if current_section and current_bars:
-                        self._organize_bars_into_columns(current_section, current_bars, current_bars_per_line, current_beat)
-                        current_bars = []
                     current_section = Section(value)
                     score.sections.append(current_section)
                     current_column = None
                 continue
-            if line.startswith('[') and line.endswith(']'):
-                if current_section and current_bars:
-                    self._organize_bars_into_columns(current_section, current_bars, current_bars_per_line, current_beat)
-                    current_bars = []
+            if first == '[' and line[-1] == ']':
                 current_section = self.parse_section_header(line)
                 score.sections.append(current_section)
                 current_column = None
@@ -220,17 +243,13 @@ class ScoreBuilder:
                 current_section = Section("Default")
                 score.sections.append(current_section)
                 current_column = None
-            if line.strip():
-                bar = self.parse_bar_line(line)
-                if bar:
-                    current_bars.append(bar)
-                    # bars_per_lineに達したらカラムを作成
-                    if len(current_bars) == current_bars_per_line:
-                        self._organize_bars_into_columns(current_section, current_bars, current_bars_per_line, current_beat)
-                        current_bars = []
-        # 残りの小節をカラムに
-        if current_section and current_bars:
-            self._organize_bars_into_columns(current_section, current_bars, current_bars_per_line, current_beat)
+            bar = parse_bar_line(line)
+            if bar:
+                # カラムがないか、bars_per_lineに達していたら新しいカラムを作成
+                if current_column is None or len(current_column.bars) >= current_bars_per_line:
+                    current_column = Column([], current_bars_per_line, current_beat)
+                    current_section.columns.append(current_column)
+                current_column.bars.append(bar)
         return score
     
     # 後方互換性のためのメソッド
@@ -298,27 +317,34 @@ class ScoreBuilder:
     def _build_bar(self, bar_info, current_beat=None):
         """BarInfoからBarを構築する"""
         # 小節の基本設定
-        bar = Bar(
-            notes=[],  # 初期値は空のリスト
-            beat=current_beat or getattr(bar_info, 'beat', '4/4')
-        )
+        # 音符は初期値として空のリスト（位置引数で notes, beat の順）
+        bar = Bar([], current_beat or getattr(bar_info, 'beat', '4/4'))
         # is_repeat_symbol, repeat_bars, is_dummyをコピー
+        # （BarInfoの種類によっては持たない属性なのでgetattrで取得。
+        #  どちらのBarInfoも__dict__を持たないので__dict__.getによる近道は使えない）
         bar.is_repeat_symbol = getattr(bar_info, 'is_repeat_symbol', False)
         bar.repeat_bars = getattr(bar_info, 'repeat_bars', None)
         # 繰り返し記号の小節はis_dummyをTrueに設定
         bar.is_dummy = bar.is_repeat_symbol or getattr(bar_info, 'is_dummy', False)
         # コンテンツがある場合は解析
-        if hasattr(bar_info, 'content') and bar_info.content:
-            # BarBuilderを使用して音符を解析
-            content = bar_info.content
-            self.bar_builder.current_line = self.current_line
-            parsed_bar = self.bar_builder.parse_bar_line(content)
-            bar.notes = parsed_bar.notes
-        # 繰り返し記号の設定
-        bar.is_repeat_start = getattr(bar_info, 'repeat_start', False)
-        bar.is_repeat_end = getattr(bar_info, 'repeat_end', False)
-        # n番括弧の設定
-        bar.volta_number = getattr(bar_info, 'volta_number', None)
-        bar.volta_start = getattr(bar_info, 'volta_start', False)
-        bar.volta_end = getattr(bar_info, 'volta_end', False)
+        content = bar_info.content
+        if content:
+            bar_builder = self.bar_builder
+            # 弦や音価の省略は直前の音符の状態に依存するので、その状態もキーに含める
+            key = (content, bar_builder.last_string, bar_builder.last_duration,
+                   bar_builder.note_builder.tuning)
+            cached = self._bar_cache.get(key)
+            if cached is None:
+                # BarBuilderを使用して音符を解析
+                bar_builder.current_line = self.current_line
+                parsed_bar = bar_builder.parse_bar_line(content)
+                bar.notes = parsed_bar.notes
+                self._bar_cache[key] = (parsed_bar.notes, bar_builder.last_string, bar_builder.last_duration)
+            else:
+                # 同じ内容の小節はパースを省略し、音符を複製して使う
+                notes, bar_builder.last_string, bar_builder.last_duration = cached
+                bar.notes = [note.copy() for note in notes]
+        # 繰り返し記号とn番括弧の設定（どのBarInfoも必ず持つ属性なので一括で取得する）
+        (bar.is_repeat_start, bar.is_repeat_end,
+         bar.volta_number, bar.volta_start, bar.volta_end) = _BAR_INFO_FLAGS(bar_info)
         return bar 
\ No newline at end of file
@@ -6,17 +6,17 @@ class NoteBuilder:
     
     def build_note(self, string, fret, duration):
         """音符を構築する"""
-        note = Note(string=string, fret=fret, duration=duration)
+        note = Note(string, fret, duration)
         return note
     
     def build_rest(self, duration):
         """休符を構築する"""
-        note = Note(string=None, fret="r", duration=duration)
+        note = Note(None, "r", duration)
         return note
     
     def build_muted(self, string, duration):
         """ミュート音符を構築する"""
-        note = Note(string=string, fret="x", duration=duration)
+        note = Note(string, "x", duration)
         return note
     
     def build_triplet(self, notes, duration):
@@ -25,15 +25,13 @@ class NoteBuilder:
             raise ParseError("Invalid triplet: must contain exactly 3 notes")
         
         # 三連符グループの親音符を作成
-        triplet = Note(string=notes[0].string, fret=notes[0].fret, duration=duration)
+        triplet = Note(notes[0].string, notes[0].fret, duration)
         triplet.is_triplet = True
-        triplet.triplet_notes = []
         
-        # 三連符内の各音符を処理
+        # 三連符内の各音符の音価を親音符と同じに設定
         for note in notes:
-            # 音価を親音符と同じに設定
             note.duration = duration
-            triplet.triplet_notes.append(note)
+        triplet.triplet_notes = list(notes)
         
         return triplet
     
@@ -53,13 +51,14 @@ class NoteBuilder:
             if note_str == "r":
                 # 休符
                 notes.append(self.build_rest(None))
-            elif "-x" in note_str or "-X" in note_str:
+                continue
+            # 弦とフレットは1回の分割で取り出す
+            string, _, fret = note_str.partition("-")
+            if fret[:1] in ('x', 'X'):
                 # ミュート音符
-                string = int(note_str.split("-")[0])
-                notes.append(self.build_muted(string, None))
+                notes.append(self.build_muted(int(string), None))
             else:
                 # 通常の音符
-                string, fret = note_str.split("-")
                 notes.append(self.build_note(int(string), fret, None))
         
         return notes 
\ No newline at end of file
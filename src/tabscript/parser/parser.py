@@ -34,25 +34,18 @@ class Parser:
         if note_str == "r":
             return self.note_builder.build_rest(None)
         
-        if "-x" in note_str or "-X" in note_str:
-            string = int(note_str.split("-")[0])
-            return self.note_builder.build_muted(string, None)
+        # 弦とフレットは1回の分割で取り出す
+        string, _, fret = note_str.partition("-")
+        if fret[:1] in ('x', 'X'):
+            return self.note_builder.build_muted(int(string), None)
         
-        string, fret = note_str.split("-")
         return self.note_builder.build_note(int(string), fret, None)
     
     def parse_bar(self, bar_str):
         """小節をパースする"""
-        # 音符を分割
-        note_strings = bar_str.split()
-        
-        # 各音符をパース
-        notes = []
-        for note_str in note_strings:
-            note = self.parse_note(note_str)
-            notes.append(note)
-        
-        return Bar(notes=notes)
+        # 音符を分割して各音符をパース
+        parse_note = self.parse_note
+        return Bar(notes=[parse_note(note_str) for note_str in bar_str.split()])
     
     def analyze_structure(self, content):
         """TabScriptの構造を解析する"""
@@ -2,6 +2,25 @@ import re
 import logging
 from tabscript.exceptions import ParseError  # 正しい例外クラスをインポート
 
+# 前処理で使う正規表現はモジュール読み込み時に一度だけコンパイルしておく
+# コメント（'''や"""で囲まれた複数行、閉じられていない複数行、//の行末、#の行頭）を
+# 1回の走査でまとめて除去する。左端一致なので先に現れたコメントが優先される
+_RE_ALL_COMMENTS = re.compile(
+    r"'''[\s\S]*?'''"
+    r'|"""[\s\S]*?"""'
+    r'|(?:\'\'\'|""")[\s\S]*\Z'
+    r'|[ \t]*//[^\n]*'
+    r'|^[ \t]*#[^\n]*',
+    re.MULTILINE
+)
+_RE_BLANK_LINES = re.compile(r'\n\s*\n')
+_RE_SECTION_SPACING = re.compile(r'\n*(\[\w+\])\n*')
+_RE_VOLTA_BLOCK = re.compile(r'\{(\d+)\s*\n(.*?)\n\s*(\d+)\}', re.DOTALL)
+_RE_REPEAT_BLOCK = re.compile(r'\{\s*\n(.*?)\n\s*\}', re.DOTALL)
+# 閉じ括弧の連続は後続の } を先読みして、1回の置換で連なり全体を1行にまとめる
+_RE_NESTED_NBRACE = re.compile(r'(\d+)\}\s*\n\s*(?=\})')
+_RE_NESTED_BRACE = re.compile(r'\}\s*\n\s*(?=\})')
+
 class TextPreprocessor:
     """テキスト前処理を担当するクラス"""
     
@@ -38,10 +57,8 @@ class TextPreprocessor:
         """
         # コメントを除去
         text = self._clean_text(text)
-        # 繰り返し記号を正規化
-        text = self._normalize_repeat_brackets(text)
-        # n番カッコを正規化
-        text = self._normalize_volta_brackets(text)
+        # 繰り返し記号とn番カッコを一度に正規化
+        text = self._normalize_all_brackets(text)
         return text
     
     def preprocess(self, text: str) -> str:
@@ -58,26 +75,14 @@ class TextPreprocessor:
         """
         self.debug_print("\n=== _clean_text ===", level=1)
         
-        # 行末コメントの削除（//で始まるコメント）
-        text = re.sub(r'\s*//.*$', '', text, flags=re.MULTILINE)
-        
-        # 行頭コメントの削除（#で始まる行、インデントを考慮）
-        text = re.sub(r'^\s*#.*$', '', text, flags=re.MULTILINE)
-        
-        # 複数行コメントの削除（''' と """ の両方）
-        # まず '''で囲まれた部分を削除
-        text = re.sub(r"'''[\s\S]*?'''", '', text)
-        # 次に """で囲まれた部分を削除
-        text = re.sub(r'"""[\s\S]*?"""', '', text)
-        
-        # 閉じられていない複数行コメントの処理
-        open_comment = re.search(r"('''|\"\"\")([\s\S]*)$", text)
-        if open_comment:
-            # コメント開始位置から末尾までを削除
-            text = text[:open_comment.start()]
+        # 行末コメント・行頭コメント・複数行コメントを一度に削除
+        # （閉じられていない複数行コメントは末尾まで削除）
+        # コメント記号を含まないテキストでは正規表現の走査を省略する
+        if '#' in text or '//' in text or "'''" in text or '"""' in text:
+            text = _RE_ALL_COMMENTS.sub('', text)
         
         # 空行を削除（連続する改行を一つに）
-        text = re.sub(r'\n\s*\n', '\n', text)
+        text = _RE_BLANK_LINES.sub('\n', text)
         
         # 先頭と末尾の空白を削除
         text = text.strip()
@@ -90,10 +95,10 @@ class TextPreprocessor:
     def _normalize_empty_lines(self, text: str) -> str:
         """空行の正規化"""
         # 連続する空行を1行に
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+        text = _RE_BLANK_LINES.sub('\n\n', text)
         
         # セクション区切り（[名前]）の前後に空行を2行ずつ
-        text = re.sub(r'\n*(\[\w+\])\n*', r'\n\n\1\n\n', text)
+        text = _RE_SECTION_SPACING.sub(r'\n\n\1\n\n', text)
         
         return text
     
@@ -125,7 +130,7 @@ class TextPreprocessor:
             return f"{{{n} {content} }}{n}"
         
         # "{n\n...\nn}" パターンを検出
-        text = re.sub(r'\{(\d+)\s*\n(.*?)\n\s*(\d+)\}', normalize_volta, text, flags=re.DOTALL)
+        text = _RE_VOLTA_BLOCK.sub(normalize_volta, text)
         
         # 段階2: "{\n...\n}" パターンを "{ ... }" に変換
         def normalize_repeat(match):
@@ -134,106 +139,75 @@ class TextPreprocessor:
                 raise ValueError("Empty repeat bracket")
             return f"{{ {content} }}"
         
-        text = re.sub(r'\{\s*\n(.*?)\n\s*\}', normalize_repeat, text, flags=re.DOTALL)
+        text = _RE_REPEAT_BLOCK.sub(normalize_repeat, text)
         
         # 段階3: 特殊ケース - n}\n} パターンを n} } に変換
-        text = re.sub(r'(\d+)\}\s*\n\s*\}', r'\1} }', text)
+        text = _RE_NESTED_NBRACE.sub(r'\1} ', text)
         
         # 段階4: 特殊ケース - }\n} パターンを } } に変換
-        text = re.sub(r'\}\s*\n\s*\}', r'} }', text)
+        text = _RE_NESTED_BRACE.sub('} ', text)
         
         # 段階5: 行単位での処理で残りのケースを処理
-        lines = text.splitlines()
+        # 1行ごとに先頭・末尾の文字で判定し、正規表現は使わない
         result = []
         
-        # カッコの処理状態を追跡
-        in_repeat = False
-        in_volta = False
-        repeat_content = []
-        volta_content = []
+        # カッコの処理状態を追跡（None: 括弧の外, 'repeat': 繰り返し記号内, 'volta': n番カッコ内）
+        state = None
+        content = []
         volta_number = None
         
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
+        for i, line in enumerate(text.splitlines()):
+            line = line.strip()
             
-            # n番カッコの開始 {n を検出
-            volta_start_match = re.match(r'^\{(\d+)$', line)
-            if volta_start_match and not in_repeat and not in_volta:
-                in_volta = True
-                volta_number = volta_start_match.group(1)
-                volta_content = []
-                i += 1
+            if state is None:
+                # 繰り返し記号の開始 { を検出
+                if line == '{':
+                    state = 'repeat'
+                    content = []
+                    continue
+                # n番カッコの開始 {n を検出
+                if line[:1] == '{' and line[1:].isdecimal():
+                    state = 'volta'
+                    volta_number = line[1:]
+                    content = []
+                    continue
+                # 括弧の外の行（正規化済みの括弧を含む）はそのまま追加
+                result.append(line)
                 continue
             
             # n番カッコの終了 n} を検出
-            volta_end_match = re.match(r'^(\d+)\}$', line)
-            if volta_end_match and in_volta:
-                end_number = volta_end_match.group(1)
-                
-                if volta_number != end_number:
+            if state == 'volta' and line[-1:] == '}' and line[:-1].isdecimal():
+                if line[:-1] != volta_number:
                     # 番号が一致しない場合はエラー
                     raise ValueError(f"Mismatched volta bracket number at line {i+1}")
-                
-                in_volta = False
-                if not volta_content:
+                if not content:
                     raise ValueError(f"Empty volta bracket at line {i+1}")
                 
                 # n番カッコ内容を一行に結合
-                content = '\n'.join(volta_content)
-                result.append(f"{{{volta_number} {content} }}{volta_number}")
+                joined = '\n'.join(content)
+                result.append(f"{{{volta_number} {joined} }}{volta_number}")
+                state = None
                 volta_number = None
-                i += 1
-                continue
-            
-            # 繰り返し記号の開始 { を検出
-            if line == '{' and not in_repeat and not in_volta:
-                in_repeat = True
-                repeat_content = []
-                i += 1
                 continue
             
             # 繰り返し記号の終了 } を検出
-            if line == '}' and in_repeat:
-                in_repeat = False
-                if not repeat_content:
+            if state == 'repeat' and line == '}':
+                if not content:
                     raise ValueError(f"Empty repeat bracket at line {i+1}")
                 
                 # 繰り返し内容を一行に結合
-                content = '\n'.join(repeat_content)
-                result.append(f"{{ {content} }}")
-                i += 1
-                continue
-            
-            # n番カッコと繰り返し記号が両方とも閉じられている場合
-            if not in_volta and not in_repeat:
-                # 既に正規化された括弧パターンをチェック
-                if re.match(r'^\{\d+\s+.*\s+\}\d+$', line) or re.match(r'^\{\s+.*\s+\}$', line):
-                    # 既に正規化された形式ならそのまま追加
-                    result.append(line)
-                elif re.match(r'^\d+\}\s+\}$', line):
-                    # ネストされた括弧の終了パターンはそのまま保持
-                    result.append(line)
-                else:
-                    # それ以外の通常の行
-                    result.append(line)
-                i += 1
+                joined = '\n'.join(content)
+                result.append(f"{{ {joined} }}")
+                state = None
                 continue
             
             # 括弧内の行を蓄積
-            if in_volta:
-                volta_content.append(line)
-            elif in_repeat:
-                repeat_content.append(line)
-            else:
-                result.append(line)
-            
-            i += 1
+            content.append(line)
         
         # 閉じられていない括弧があればエラー
-        if in_volta:
+        if state == 'volta':
             raise ValueError("Unclosed volta bracket")
-        if in_repeat:
+        if state == 'repeat':
             raise ValueError("Unclosed repeat bracket")
         
         result_text = '\n'.join(result)
@@ -244,6 +218,7 @@ class TextPreprocessor:
         return result_text
     
     # 以下の2つのメソッドは互換性のために残しておく
+    # （どちらも全体を正規化するので、続けて両方呼ぶ必要はない）
     def _normalize_repeat_brackets(self, text: str) -> str:
         """互換性のために残す（新メソッドを呼び出す）"""
         return self._normalize_all_brackets(text)
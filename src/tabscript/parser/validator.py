@@ -1,6 +1,16 @@
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
+import re
 from fractions import Fraction
 from ..exceptions import ParseError
+from ..models import STRING_COUNTS
+
+# 検証用の表はモジュール読み込み時に一度だけ作成する
+# 音価: 基本の音価に付点が最大1つ
+_RE_DURATION = re.compile(r'\A(?:1|2|4|8|16|32|64)\.?\Z')
+# 和音表記: "(" で始まり最初の "):" の後ろ（次の "):" まで）が音価
+_RE_CHORD_NOTATION = re.compile(r'\A\(.*?\):(.*?)(?:\):|\Z)', re.DOTALL)
+_VALID_BEATS = frozenset({"4/4", "3/4", "2/4", "6/8", "9/8", "12/8"})
+_VALID_TUNINGS = frozenset(STRING_COUNTS)
 
 class TabScriptValidator:
     """TabScriptの検証を行うクラス"""
@@ -10,6 +20,18 @@ class TabScriptValidator:
         self.tuning = "guitar"  # デフォルトはギター
         self.beat = "4/4"       # デフォルトは4/4拍子
         self.current_line = 0   # 現在処理中の行番号
+        self._expected_durations = {}  # 拍子記号 -> 期待される小節の長さ
+    
+    @property
+    def tuning(self) -> str:
+        """チューニング"""
+        return self._tuning
+    
+    @tuning.setter
+    def tuning(self, value: str) -> None:
+        """チューニングを設定し、最大弦番号も更新する"""
+        self._tuning = value
+        self._max_string = STRING_COUNTS.get(value, 6)  # デフォルトは6弦
     
     def validate_duration(self, duration: str) -> bool:
         """音価の検証
@@ -23,28 +45,18 @@ class TabScriptValidator:
         Raises:
             ParseError: 無効な音価の場合
         """
-        # 付点の処理
-        has_dot = duration.endswith('.')
-        base_duration = duration[:-1] if has_dot else duration
-        
-        # 有効な音価のリスト
-        valid_durations = ["1", "2", "4", "8", "16", "32", "64"]
-        
-        if base_duration not in valid_durations:
-            raise ParseError(f"Invalid duration: {duration}", self.current_line)
-        
-        # 二重付点以上はエラー
-        if duration.count('.') > 1:
+        # 有効な音価と付点（二重付点以上はエラー）を1回の照合で検証
+        if not _RE_DURATION.match(duration):
             raise ParseError(f"Invalid duration: {duration}", self.current_line)
         
         return True
     
-    def validate_bar_duration(self, beat: str, total_duration: float) -> bool:
+    def validate_bar_duration(self, beat: str, total_duration: Union[Fraction, int, float]) -> bool:
         """小節の長さを検証
         
         Args:
             beat: 拍子記号（例: "4/4", "3/4"）
-            total_duration: 小節内の音符の合計長さ
+            total_duration: 小節内の音符の合計長さ（Note.stepの合計ならFraction）
             
         Returns:
             bool: 小節の長さが正しい場合はTrue
@@ -54,8 +66,9 @@ class TabScriptValidator:
         """
         expected_duration = self._calculate_expected_duration(beat)
         
-        # 許容誤差（浮動小数点の誤差を考慮）
-        epsilon = 0.001
+        # Fraction・整数は誤差がないので厳密に比較する
+        # 浮動小数点の場合のみ許容誤差を考慮する
+        epsilon = 0.001 if isinstance(total_duration, float) else 0
         
         if total_duration < expected_duration - epsilon:
             raise ParseError(f"Bar duration is too short: {total_duration} (expected {expected_duration})", self.current_line)
@@ -65,21 +78,27 @@ class TabScriptValidator:
         
         return True
     
-    def _calculate_expected_duration(self, beat: str) -> float:
+    def _calculate_expected_duration(self, beat: str) -> int:
         """拍子記号から期待される小節の長さを計算
         
         Args:
             beat: 拍子記号（例: "4/4", "3/4"）
             
         Returns:
-            float: 期待される小節の長さ
+            int: 期待される小節の長さ（4分音符単位）
         """
+        # 小節ごとに呼ばれるので、拍子記号ごとに結果をキャッシュする
+        expected = self._expected_durations.get(beat)
+        if expected is not None:
+            return expected
+        
         try:
             numerator, denominator = map(int, beat.split('/'))
-            # 4/4拍子なら4、3/4拍子なら3を返す
-            return numerator
         except ValueError:
             raise ParseError(f"Invalid beat format: {beat}", self.current_line)
+        # 4/4拍子なら4、3/4拍子なら3を返す
+        self._expected_durations[beat] = numerator
+        return numerator
     
     def validate_chord_notation(self, chord_notation: str) -> bool:
         """和音表記の検証
@@ -93,16 +112,13 @@ class TabScriptValidator:
         Raises:
             ParseError: 無効な和音表記の場合
         """
-        # 基本的な形式チェック
-        if not chord_notation.startswith('(') or '):' not in chord_notation:
+        # 基本的な形式チェックと音価の取り出しを1回の照合で行う
+        match = _RE_CHORD_NOTATION.match(chord_notation)
+        if not match:
             raise ParseError(f"Invalid chord notation: {chord_notation}", self.current_line)
         
         # 音価の検証
-        try:
-            duration = chord_notation.split('):')[1]
-            self.validate_duration(duration)
-        except IndexError:
-            raise ParseError(f"Invalid chord notation: {chord_notation}", self.current_line)
+        self.validate_duration(match.group(1))
         
         return True
     
@@ -128,11 +144,7 @@ class TabScriptValidator:
             raise ParseError(f"Invalid beat format: {beat}", self.current_line)
         
         # サポートされている拍子のチェック
-        valid_beats = [
-            "4/4", "3/4", "2/4", "6/8", "9/8", "12/8"
-        ]
-        
-        if beat not in valid_beats:
+        if beat not in _VALID_BEATS:
             raise ParseError(f"Invalid beat: {beat}", self.current_line)
         
         return True
@@ -149,11 +161,7 @@ class TabScriptValidator:
         Raises:
             ParseError: 無効なチューニングの場合
         """
-        valid_tunings = [
-            "guitar", "guitar7", "bass", "bass5", "ukulele"
-        ]
-        
-        if tuning not in valid_tunings:
+        if tuning not in _VALID_TUNINGS:
             raise ParseError(f"Invalid tuning: {tuning}", self.current_line)
         
         return True
@@ -170,18 +178,10 @@ class TabScriptValidator:
         Raises:
             ParseError: 無効な弦番号の場合
         """
-        # チューニングに基づく弦の数
-        string_counts = {
-            "guitar": 6,
-            "guitar7": 7,
-            "bass": 4,
-            "bass5": 5,
-            "ukulele": 4
-        }
-        
-        max_string = string_counts.get(self.tuning, 6)
-        
-        if string_number < 1 or string_number > max_string:
+        # チューニングに基づく弦の数（チューニング設定時に計算済み）
+        max_string = self._max_string
+        
+        if not 1 <= string_number <= max_string:
             raise ParseError(f"Invalid string number: {string_number} (max: {max_string})", self.current_line)
         
         return True
@@ -1,65 +1,120 @@
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.units import mm
-from .models import Score, Section, Bar, Note
+from .models import Score, Section, Bar, Note, STRING_COUNTS
 from .exceptions import TabScriptError
 from typing import List, Tuple, Dict
 from .style import StyleManager
-from pdf2image import convert_from_path
 import os
+from itertools import accumulate, chain
+from functools import lru_cache
+
+# 音価文字列 -> (分母, 付点の有無) の対応表
+_DUR_TABLE = {
+    d: (int(d[:-1]), True) if d.endswith('.') else (int(d), False)
+    for d in ("1", "2", "4", "8", "16", "32", "64",
+              "1.", "2.", "4.", "8.", "16.", "32.", "64.")
+}
+
+@lru_cache(maxsize=64)
+def _plain_duration_base(duration: str):
+    """付点なしの音価なら分母を返す（それ以外はNone）
+
+    表にない音価も含めて、同じ音価文字列の結果はキャッシュする
+    """
+    entry = _DUR_TABLE.get(duration)
+    if entry is not None:
+        return None if entry[1] else entry[0]
+    # 表にない音価は従来通り数字のみの場合に限り分母として扱う
+    return int(duration) if duration.isdigit() else None
+
+@lru_cache(maxsize=256)
+def _string_width(text: str, font_name: str, font_size: float) -> float:
+    """文字列幅をフォントのメトリクスから求める（フレット番号など同じ文字列を何度も測るためキャッシュする）
+
+    幅は描画先のキャンバスではなく、登録済みフォントのメトリクスだけで決まる
+    """
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    return stringWidth(text, font_name, font_size)
 
 class NoteRenderer:
     """音符の描画を担当するクラス"""
+    # フレット番号の描画位置の定数（音符ごとに計算し直さない）
+    _FRET_X_OFFSET = 1 * mm  # 音符位置から文字までの距離
+    _FRET_TEXT_HEIGHT = 10
+    _FRET_RECT_Y_OFFSET = _FRET_TEXT_HEIGHT / 2  # 背景矩形の下端
+    _FRET_TEXT_Y_OFFSET = _FRET_TEXT_HEIGHT / 3  # 文字のベースライン
+
     def __init__(self, style_manager: StyleManager):
         self.style_manager = style_manager
 
     def render_note(self, canvas, note: Note, x: float, y: float, y_offset: float = 0, y_positions: List[float] = None):
         """音符を描画"""
+        rects, texts = [], []
+        self._collect_note_marks(canvas, note, x, y, y_offset, y_positions, rects, texts)
+        self._draw_marks(canvas, rects, texts)
+
+    def _collect_note_marks(self, canvas, note: Note, x: float, y: float, y_offset: float, y_positions: List[float],
+                            rects: list, texts: list):
+        """音符のフレット番号の背景矩形と文字をrects/textsに追加"""
         if note.is_rest:
             return
         
         if note.is_chord and getattr(note, 'is_chord_start', False):
-            self._draw_chord_notes(canvas, x, note, y_positions, y_offset)
+            self._collect_chord_marks(canvas, x, note, y_positions, y_offset, rects, texts)
         elif not note.is_chord:
             if '{' in str(note.fret):
                 y -= y_offset
-            self._draw_fret_number(canvas, x, y, note.fret, note.connect_next)
+            self._collect_fret_marks(canvas, x, y, note.fret, rects, texts)
 
     def _draw_fret_number(self, canvas, x: float, y: float, fret: str, connect_next: bool = False):
         """フレット番号を描画"""
-        canvas.setFont("Helvetica", 10)
+        rects, texts = [], []
+        self._collect_fret_marks(canvas, x, y, fret, rects, texts)
+        self._draw_marks(canvas, rects, texts)
+
+    def _collect_fret_marks(self, canvas, x: float, y: float, fret: str, rects: list, texts: list):
+        """フレット番号の背景矩形と文字をrects/textsに追加"""
         fret_str = "X" if fret == "X" else str(fret)
+        text_height = self._FRET_TEXT_HEIGHT
+        text_x = x + self._FRET_X_OFFSET
+        rect_y = y - self._FRET_RECT_Y_OFFSET
+        text_y = y - self._FRET_TEXT_Y_OFFSET
         
         # 二桁の数字の場合、文字間隔を詰める
         if len(fret_str) > 1 and fret_str.isdigit():
-            # 各桁の文字を個別に描画
-            text_height = 10
-            canvas.setFillColor('white')
             # 背景を少し広めに取る
-            text_width = canvas.stringWidth(fret_str, "Helvetica", 10) * 0.8  # 20%縮小
-            canvas.rect(x + 1 * mm, y - text_height/2, text_width + 1, text_height, fill=1, stroke=0)
-            canvas.setFillColor('black')
+            text_width = _string_width(fret_str, "Helvetica", 10) * 0.8  # 20%縮小
+            rects.append((text_x, rect_y, text_width + 1, text_height))
             
             # 各桁を個別に描画（間隔を詰める）
             first_digit = fret_str[0]
             second_digit = fret_str[1]
-            first_width = canvas.stringWidth(first_digit, "Helvetica", 10)
-            second_width = canvas.stringWidth(second_digit, "Helvetica", 10)
+            first_width = _string_width(first_digit, "Helvetica", 10)
             
             # 最初の桁を描画
-            canvas.drawString(x + 1 * mm, y - text_height/3, first_digit)
+            texts.append((text_x, text_y, first_digit))
             # 2桁目の位置を調整（間隔を詰める）
-            canvas.drawString(x + 1 * mm + first_width * 0.7, y - text_height/3, second_digit)
+            texts.append((text_x + first_width * 0.7, text_y, second_digit))
         else:
             # 一桁の数字やXの場合は通常通り描画
-            text_width = canvas.stringWidth(fret_str, "Helvetica", 10)
-            text_height = 10
-            canvas.setFillColor('white')
-            canvas.rect(x + 1 * mm, y - text_height/2, text_width + 1, text_height, fill=1, stroke=0)
-            canvas.setFillColor('black')
-            canvas.drawString(x + 1 * mm, y - text_height/3, fret_str)
+            text_width = _string_width(fret_str, "Helvetica", 10)
+            rects.append((text_x, rect_y, text_width + 1, text_height))
+            texts.append((text_x, text_y, fret_str))
+
+    def _draw_marks(self, canvas, rects: list, texts: list):
+        """背景矩形と文字をそれぞれまとめて描画（色とフォントの切り替えは1回ずつ）"""
+        if not rects:
+            return
+        canvas.setFont("Helvetica", 10)
+        canvas.setFillColor('white')
+        for rx, ry, rw, rh in rects:
+            canvas.rect(rx, ry, rw, rh, fill=1, stroke=0)
+        canvas.setFillColor('black')
+        # 文字は1つのテキストオブジェクトにまとめ、PDFのBT...ETブロックを1つで済ませる
+        text_obj = canvas.beginText()
+        for tx, ty, text in texts:
+            text_obj.setTextOrigin(tx, ty)
+            text_obj.textOut(text)
+        canvas.drawText(text_obj)
 
     def _draw_tie(self, canvas, x1: float, y1: float, x2: float, y2: float, is_quarter_circle: bool = False):
         """タイ・スラーを描画
@@ -100,20 +155,27 @@ class NoteRenderer:
 
     def _draw_chord_notes(self, canvas, x: float, note: Note, y_positions: List[float], y_offset: float = 0):
         """和音の音符を描画"""
-        # 最初の音符を描画
+        rects, texts = [], []
+        self._collect_chord_marks(canvas, x, note, y_positions, y_offset, rects, texts)
+        self._draw_marks(canvas, rects, texts)
+
+    def _collect_chord_marks(self, canvas, x: float, note: Note, y_positions: List[float], y_offset: float,
+                             rects: list, texts: list):
+        """和音の音符の背景矩形と文字をrects/textsに追加"""
+        # 最初の音符
         y = y_positions[note.string - 1]
         if '{' in str(note.fret):
             y -= y_offset
-        self._draw_fret_number(canvas, x, y, note.fret, note.connect_next)
+        self._collect_fret_marks(canvas, x, y, note.fret, rects, texts)
         
-        # 和音の他の音符を描画
+        # 和音の他の音符
         if hasattr(note, 'chord_notes') and note.chord_notes:
             for chord_note in note.chord_notes:
                 # 各音符の弦の位置に応じてY座標を取得
                 chord_y = y_positions[chord_note.string - 1]
                 if '{' in str(chord_note.fret):
                     chord_y -= y_offset
-                self._draw_fret_number(canvas, x, chord_y, chord_note.fret, chord_note.connect_next)
+                self._collect_fret_marks(canvas, x, chord_y, chord_note.fret, rects, texts)
 
 class TripletRenderer:
     """三連符の描画を担当するクラス"""
@@ -123,27 +185,31 @@ class TripletRenderer:
     def detect_triplet_ranges(self, bar: Bar, note_x_positions: List[float], canvas) -> List[Tuple[float, float, int, int]]:
         """三連符の範囲を検出"""
         triplet_ranges = []
+        notes = bar.notes
+        # 連符の種類と付点なし音価の分母は音符ごとに一度だけ求めておく
+        tuplets = [getattr(note, 'tuplet', None) for note in notes]
+        bases = [_plain_duration_base(note.duration) for note in notes]
         i = 0
-        while i < len(bar.notes):
-            tuplet_type = getattr(bar.notes[i], 'tuplet', None)
+        while i < len(notes):
+            tuplet_type = tuplets[i]
             if tuplet_type is not None:
                 start = i
                 n = tuplet_type
-                denominators = [int(bar.notes[j].duration) for j in range(i, len(bar.notes)) 
-                              if getattr(bar.notes[j], 'tuplet', None) == n and bar.notes[j].duration.isdigit()]
-                m = max(denominators) if denominators else 8
+                # 以降の同じ連符の音符で最も細かい音価（なければ8分音符）
+                m = max((bases[j] for j in range(i, len(notes))
+                         if tuplets[j] == n and bases[j] is not None), default=8)
                 expected = n / m
                 actual = 0
                 end = i
-                while end < len(bar.notes) and getattr(bar.notes[end], 'tuplet', None) == n:
-                    if bar.notes[end].duration.isdigit():
-                        actual += 1 / int(bar.notes[end].duration)
+                while end < len(notes) and tuplets[end] == n:
+                    if bases[end] is not None:
+                        actual += 1 / bases[end]
                     end += 1
                     if abs(actual - expected) < 1e-6:
                         break
                 if abs(actual - expected) < 1e-6:
                     x1 = note_x_positions[start] + 1.5 * mm
-                    x2 = note_x_positions[end-1] + 1.5 * mm + canvas.stringWidth(str(bar.notes[end-1].fret), "Helvetica", 10)
+                    x2 = note_x_positions[end-1] + 1.5 * mm + _string_width(str(notes[end-1].fret), "Helvetica", 10)
                     triplet_ranges.append((x1, x2, start, end-1))
                     i = end
                 else:
@@ -154,36 +220,47 @@ class TripletRenderer:
 
     def draw_triplet_marks(self, canvas, triplet_ranges: List[Tuple[float, float, int, int]], y_positions: List[float], triplet_y: float = None):
         """三連符記号を描画"""
+        if not triplet_ranges:
+            return
+        string_spacing = self.style_manager.get("string_spacing")
+        y_triplet = triplet_y if triplet_y is not None else y_positions[0] + string_spacing  # triplet_yが指定されていない場合は従来通り
+        text_y_offset = - string_spacing * 0.1
+        bracket_height = self.style_manager.get("triplet_bracket_height", 2.5 * mm)
+        
+        # 全ての連符のカッコ線を1つのパスにまとめて描画
+        path = canvas.beginPath()
         for x1, x2, start, end in triplet_ranges:
-            string_spacing = self.style_manager.get("string_spacing")
-            y_triplet = triplet_y if triplet_y is not None else y_positions[0] + string_spacing  # triplet_yが指定されていない場合は従来通り
-            text_y_offset = - string_spacing * 0.1
-            bracket_height = self.style_manager.get("triplet_bracket_height", 2.5 * mm)
-            
             # 上線
-            canvas.line(x1, y_triplet, x2, y_triplet)
+            path.moveTo(x1, y_triplet)
+            path.lineTo(x2, y_triplet)
             
             # 左縦線
-            canvas.line(x1, y_triplet, x1, y_triplet - bracket_height)
+            path.moveTo(x1, y_triplet)
+            path.lineTo(x1, y_triplet - bracket_height)
             
             # 右縦線
-            canvas.line(x2, y_triplet, x2, y_triplet - bracket_height)
-            
-            # 3の数字
-            canvas.setFont("Helvetica-Bold", 10)
-            text = "3"
-            text_width = canvas.stringWidth(text, "Helvetica-Bold", 10)
-            text_height = 10
-            mid_x = (x1 + x2) / 2
-            
-            # 背景
-            canvas.setFillColor('white')
-            canvas.rect(mid_x - text_width/2 - 1, y_triplet - text_height/2 - 1 - text_y_offset, 
+            path.moveTo(x2, y_triplet)
+            path.lineTo(x2, y_triplet - bracket_height)
+        canvas.drawPath(path, stroke=1, fill=0)
+        
+        # 3の数字（背景とテキストはそれぞれまとめて描画）
+        canvas.setFont("Helvetica-Bold", 10)
+        text = "3"
+        text_width = _string_width(text, "Helvetica-Bold", 10)
+        text_height = 10
+        text_y = y_triplet - text_height/2 - 1 - text_y_offset
+        mid_xs = [(x1 + x2) / 2 for x1, x2, start, end in triplet_ranges]
+        
+        # 背景
+        canvas.setFillColor('white')
+        for mid_x in mid_xs:
+            canvas.rect(mid_x - text_width/2 - 1, text_y, 
                        text_width + 2, text_height + 2, fill=1, stroke=0)
-            
-            # テキスト
-            canvas.setFillColor('black')
-            canvas.drawString(mid_x - text_width/2, y_triplet - text_height/2 - 1 - text_y_offset, text)
+        
+        # テキスト
+        canvas.setFillColor('black')
+        for mid_x in mid_xs:
+            canvas.drawString(mid_x - text_width/2, text_y, text)
 
 class VoltaRenderer:
     """ボルタブラケットの描画を担当するクラス"""
@@ -194,35 +271,36 @@ class VoltaRenderer:
         """ボルタブラケットを描画"""
         # volta_yを基準に水平線の位置を計算
         bracket_y = y
+        if not (bar.volta_start or bar.volta_end):
+            return
         
-        if bar.volta_start or bar.volta_end:
-            # 横線を描画
-            canvas.setLineWidth(self.style_manager.get("volta_line_width"))
-            left_x = x + self.style_manager.get("volta_margin")
-            right_x = x + width - self.style_manager.get("volta_margin")
-            canvas.line(left_x, bracket_y, right_x, bracket_y)
-            canvas.setLineWidth(self.style_manager.get("normal_line_width"))
+        left_x = x + self.style_manager.get("volta_margin")
+        right_x = x + width - self.style_manager.get("volta_margin")
+        bottom_y = y_positions[0] + self.style_manager.get("string_bottom_margin")
         
+        # 横線と左右の縦線は1つのパスにまとめ、線幅の切り替えも1回にする
+        path = canvas.beginPath()
+        # 横線
+        path.moveTo(left_x, bracket_y)
+        path.lineTo(right_x, bracket_y)
         if bar.volta_start:
-            # 左線と数字を描画
-            canvas.setLineWidth(self.style_manager.get("volta_line_width"))
-            left_x = x + self.style_manager.get("volta_margin")
-            canvas.line(left_x, bracket_y, 
-                       left_x, y_positions[0] + self.style_manager.get("string_bottom_margin"))
-            canvas.setLineWidth(self.style_manager.get("normal_line_width"))
-            
+            # 左線
+            path.moveTo(left_x, bracket_y)
+            path.lineTo(left_x, bottom_y)
+        if bar.volta_end:
+            # 右線
+            path.moveTo(right_x, bracket_y)
+            path.lineTo(right_x, bottom_y)
+        canvas.setLineWidth(self.style_manager.get("volta_line_width"))
+        canvas.drawPath(path, stroke=1, fill=0)
+        canvas.setLineWidth(self.style_manager.get("normal_line_width"))
+        
+        if bar.volta_start:
+            # 数字を描画
             canvas.setFont("Helvetica-Bold", 10)
             canvas.drawString(left_x + 2 * mm, 
                             bracket_y - self.style_manager.get("volta_y_offset") - 1.0 * mm,
                             f"{bar.volta_number}.")
-        
-        if bar.volta_end:
-            # 右線を描画
-            canvas.setLineWidth(self.style_manager.get("volta_line_width"))
-            right_x = x + width - self.style_manager.get("volta_margin")
-            canvas.line(right_x, bracket_y, 
-                       right_x, y_positions[0] + self.style_manager.get("string_bottom_margin"))
-            canvas.setLineWidth(self.style_manager.get("normal_line_width"))
 
 class RepeatRenderer:
     """繰り返し記号の描画を担当するクラス"""
@@ -231,17 +309,19 @@ class RepeatRenderer:
 
     def draw_repeat_start(self, canvas, x: float, y_positions: List[float]):
         """繰り返し開始記号を描画"""
+        y_top, y_bottom = y_positions[0], y_positions[-1]  # 縦線の上端と下端
+        
         # 太線を描画
         canvas.setLineWidth(self.style_manager.get("repeat_line_width") )
-        canvas.line(x, y_positions[0], x, y_positions[-1])
+        canvas.line(x, y_top, x, y_bottom)
         canvas.setLineWidth(self.style_manager.get("normal_line_width"))
 
         # 細線を描画（右にシフト）
         x_shift = x + self.style_manager.get("repeat_line_spacing") + 0.5 * mm  # 0.5mm右にシフト
-        canvas.line(x_shift, y_positions[0], x_shift, y_positions[-1])
+        canvas.line(x_shift, y_top, x_shift, y_bottom)
 
         # ドットを描画（右にシフト）
-        dot_y = (y_positions[0] + y_positions[-1]) / 2
+        dot_y = (y_top + y_bottom) / 2
         dot_spacing = 6.0 * mm
         dot_offset = self.style_manager.get("repeat_x_offset") 
         canvas.circle(x + dot_offset,
@@ -255,17 +335,19 @@ class RepeatRenderer:
 
     def draw_repeat_end(self, canvas, x: float, y_positions: List[float]):
         """繰り返し終了記号を描画"""
+        y_top, y_bottom = y_positions[0], y_positions[-1]  # 縦線の上端と下端
+        
         # 太線を描画
         canvas.setLineWidth(self.style_manager.get("repeat_line_width"))
-        canvas.line(x, y_positions[0], x, y_positions[-1])
+        canvas.line(x, y_top, x, y_bottom)
         canvas.setLineWidth(self.style_manager.get("normal_line_width"))
 
         # 細線を描画（左にシフト）
         x_shift = x - self.style_manager.get("repeat_line_spacing") - 0.5 * mm  # 0.5mm左にシフト
-        canvas.line(x_shift, y_positions[0], x_shift, y_positions[-1])
+        canvas.line(x_shift, y_top, x_shift, y_bottom)
 
         # ドットを描画（左にシフト）
-        dot_y = (y_positions[0] + y_positions[-1]) / 2
+        dot_y = (y_top + y_bottom) / 2
         dot_spacing = 6.0 * mm
         dot_offset = self.style_manager.get("repeat_x_offset")
         canvas.circle(x - dot_offset,
@@ -319,8 +401,8 @@ class BarRenderer:
         self.repeat_renderer = RepeatRenderer(style_manager)
         self.dummy_bar_renderer = DummyBarRenderer(style_manager)
 
-    def render_bar(self, canvas, bar: Bar, x: float, y: float, width: float, y_positions: List[float], y_offset: float = 0):
-        """小節を描画"""
+    def render_bar(self, canvas, bar: Bar, x: float, y: float, width: float, y_positions: List[float], y_offset: float = 0, total_steps=None):
+        """小節を描画（total_stepsは呼び出し側で計算済みなら渡す）"""
         # 小節の余白を計算
         bar_margin = 1.5 * mm
         
@@ -343,26 +425,33 @@ class BarRenderer:
         # 実際に使用可能な幅を再計算
         usable_width = note_end_x - note_x
         
+        # 通常の縦線と横線は1つのパスにまとめて一度に描画する
+        path = canvas.beginPath()
+        y_top, y_bottom = y_positions[0], y_positions[-1]  # 縦線の上端と下端
+
         # 縦線を描画
         if bar.is_repeat_start and bar.volta_number is None:  # volta_numberがNoneの場合のみ描画
             self.repeat_renderer.draw_repeat_start(canvas, x, y_positions)
         elif bar.is_repeat_end or bar.volta_end:  # 反復終了またはボルタ終了の場合
             self.repeat_renderer.draw_repeat_end(canvas, x + width, y_positions)
         else:
-            canvas.line(x, y_positions[0], x, y_positions[-1])
-        
+            path.moveTo(x, y_top)
+            path.lineTo(x, y_bottom)
+
         # 横線を描画
         for y in y_positions:
-            canvas.line(x, y, x + width, y)
+            path.moveTo(x, y)
+            path.lineTo(x + width, y)
+        canvas.drawPath(path, stroke=1, fill=0)
         
         # 音符を描画
         if not bar.is_dummy:
-            self._draw_notes(canvas, bar, note_x, usable_width, y_positions, y_offset)
+            self._draw_notes(canvas, bar, note_x, usable_width, y_positions, y_offset, total_steps)
         else:
             self.dummy_bar_renderer.draw_dummy_bar(canvas, x, width, y_positions)
         
         # 最後の縦線を描画
-        canvas.line(x + width, y_positions[0], x + width, y_positions[-1])
+        canvas.line(x + width, y_top, x + width, y_bottom)
 
         # 小節の最初の音符が前の小節から接続されている場合
         if bar.notes and not bar.notes[0].is_rest and bar.notes[0].string > 0:
@@ -378,32 +467,38 @@ class BarRenderer:
                     is_quarter_circle=True
                 )
 
-    def _draw_notes(self, canvas, bar: Bar, x: float, width: float, y_positions: List[float], y_offset: float):
+    def _draw_notes(self, canvas, bar: Bar, x: float, width: float, y_positions: List[float], y_offset: float, total_steps=None):
         """音符を描画"""
         # 音符の位置を計算
-        note_x_positions = self._calculate_note_positions(bar, x, width)
-        
-        # 音符を描画
-        for i, note in enumerate(bar.notes):
-            note_x = note_x_positions[i]
+        note_x_positions = self._calculate_note_positions(bar, x, width, total_steps)
+        
+        # 音符を描画（フレット番号は背景と文字を集めて最後にまとめて描画）
+        rects, texts = [], []
+        # ループ内で繰り返し参照するものはローカル変数に束縛しておく
+        notes = bar.notes
+        last_index = len(notes) - 1
+        collect_note_marks = self.note_renderer._collect_note_marks
+        draw_tie = self.note_renderer._draw_tie
+        # 音符とX座標を並べて走査する（インデックスはタイの接続先を引くときだけ使う）
+        for i, (note, note_x) in enumerate(zip(notes, note_x_positions)):
             if not note.is_rest:
                 y = y_positions[note.string - 1]
-                self.note_renderer.render_note(canvas, note, note_x, y, y_offset, y_positions)
+                collect_note_marks(canvas, note, note_x, y, y_offset, y_positions, rects, texts)
                 
                 # タイ・スラーの描画
                 if note.connect_next:
-                    if i < len(bar.notes) - 1:  # 同じ小節内の次の音符
-                        next_note = bar.notes[i + 1]
+                    if i < last_index:  # 同じ小節内の次の音符
+                        next_note = notes[i + 1]
                         if not next_note.is_rest and next_note.string == note.string:
                             next_x = note_x_positions[i + 1]
                             next_y = y_positions[next_note.string - 1]
-                            fret_width = canvas.stringWidth(str(next_note.fret), "Helvetica", 10)
+                            fret_width = _string_width(str(next_note.fret), "Helvetica", 10)
                             next_x = next_x + fret_width / 2
-                            self.note_renderer._draw_tie(canvas, note_x + 2 * mm, y-2*mm, next_x+1*mm, next_y-2*mm)
+                            draw_tie(canvas, note_x + 2 * mm, y-2*mm, next_x+1*mm, next_y-2*mm)
                     else:  # 小節の最後の音符で、次の小節に接続
                         # 小節の右端を超えた位置まで1/4円を描画
                         bar_end_x = x + width
-                        self.note_renderer._draw_tie(
+                        draw_tie(
                             canvas,
                             note_x + 2 * mm,
                             y-2*mm,
@@ -411,29 +506,37 @@ class BarRenderer:
                             y-2*mm,
                             is_quarter_circle=True
                         )
+        
+        self.note_renderer._draw_marks(canvas, rects, texts)
 
-    def _calculate_note_positions(self, bar: Bar, x: float, width: float) -> List[float]:
-        """音符の位置を計算"""
-        note_x_positions = []
-        current_x = x
-        total_steps = sum(note.step for note in bar.notes)
+    def _calculate_note_positions(self, bar: Bar, x: float, width: float, total_steps=None) -> List[float]:
+        """音符の位置を計算（total_stepsは小節内の音符のステップ数の合計。省略時はここで計算する）"""
+        notes = bar.notes
+        if not notes:
+            return []
+        if total_steps is None:
+            total_steps = sum(note.step for note in notes)
         step_width = width / total_steps if total_steps > 0 else width
         
-        for note in bar.notes:
-            note_x_positions.append(current_x)
-            current_x += note.step * step_width
-        
-        return note_x_positions
+        # 各音符の位置は先頭からの音符幅の累積和（最後の音符の幅は不要）
+        # （accumulateのinitial引数はPython 3.8以降なので、開始位置はchainで先頭に付ける）
+        return list(accumulate(chain((x,), (note.step * step_width for note in notes[:-1]))))
 
-    def _draw_chord(self, canvas, x: float, y: float, chord: str):
-        """コード名を描画"""
+    def _draw_chords(self, canvas, chords: List[Tuple[float, str]], y: float):
+        """小節内のコード名をまとめて描画（フォント設定は1回）"""
+        if not chords:
+            return
         canvas.setFont("Helvetica", 10)
-        canvas.drawString(x + 0.5 * mm, y, chord)
+        for x, chord in chords:
+            canvas.drawString(x + 0.5 * mm, y, chord)
 
 class LayoutCalculator:
     """レイアウト計算を担当するクラス"""
     def __init__(self, style_manager: StyleManager):
         self.style_manager = style_manager
+        # 弦ごとのY方向オフセット（(弦間隔, 弦の数) -> オフセットのタプル）
+        self._string_offsets_key = None
+        self._string_offsets = ()
 
     def calculate_section_layout(self, bars_per_line: int, page_width: float) -> tuple:
         """bars_per_lineに基づいてレイアウトを計算"""
@@ -448,12 +551,8 @@ class LayoutCalculator:
 
     def calculate_bar_positions(self, bars_per_line: int, x: float, bar_width: float, bar_group_width: float, bar_group_margin: float) -> list:
         """bars_per_lineに基づいて小節の位置を計算"""
-        positions = []
-        for i in range(bars_per_line):
-            # 三連符記号がある場合は追加のマージンを設定
-            bar_x = x + (i * bar_width) 
-            positions.append(bar_x)
-        return positions
+        # 加算を積み重ねると誤差が溜まるので、各位置は先頭から掛け算で求める
+        return [x + (i * bar_width) for i in range(bars_per_line)]
 
     def calculate_string_positions(self, y: float) -> list:
         """弦の位置を計算
@@ -466,7 +565,12 @@ class LayoutCalculator:
         """
         string_spacing = self.style_manager.get("string_spacing")
         string_count = self.style_manager.get("string_count", 6)  # デフォルトは6弦
-        return [y - (i * string_spacing) for i in range(string_count)]
+        # オフセットは弦間隔と弦の数が変わったときだけ計算し直す
+        key = (string_spacing, string_count)
+        if key != self._string_offsets_key:
+            self._string_offsets = tuple(i * string_spacing for i in range(string_count))
+            self._string_offsets_key = key
+        return [y - offset for offset in self._string_offsets]
 
 class Renderer:
     def __init__(self, score: Score, debug_mode: bool = False, style_file=None, show_length: bool = False):
@@ -506,15 +610,22 @@ class Renderer:
 
     def render_pdf(self, output_path: str):
         """タブ譜をPDFとしてレンダリング"""
-        self.debug_print(f"render_pdf start: score object id = {id(self.score)}")
+        # PDF生成ライブラリは読み込みが重いので、テキスト出力だけの場合は読み込まない
+        from reportlab.pdfgen.canvas import Canvas
+        from reportlab.lib.pagesizes import A4
+        
+        if self.debug_mode:
+            self.debug_print(f"render_pdf start: score object id = {id(self.score)}")
         
         # 弦の数を設定
         string_count = self._get_string_count()
         self.style_manager.set("string_count", string_count)
-        self.debug_print(f"String count: {string_count}")
+        if self.debug_mode:
+            self.debug_print(f"String count: {string_count}")
         
         # A4縦向きでキャンバスを作成
-        canvas_obj = canvas.Canvas(output_path, pagesize=A4)
+        # （reportlabの設定に関係なく、ページの内容ストリームは常に圧縮する）
+        canvas_obj = Canvas(output_path, pagesize=A4, pageCompression=1)
         
         # 現在のページ番号を初期化
         current_page = 1
@@ -534,11 +645,25 @@ class Renderer:
         self._draw_metadata(canvas_obj, y)
         y -= 5 * mm
         
+        # 小節ごとに呼ぶ描画メソッドはループの前にローカル変数へ束縛しておく
+        bar_renderer = self.bar_renderer
+        calculate_note_positions = bar_renderer._calculate_note_positions
+        draw_volta_bracket = bar_renderer.volta_renderer.draw_volta_bracket
+        draw_chords = bar_renderer._draw_chords
+        detect_triplet_ranges = bar_renderer.triplet_renderer.detect_triplet_ranges
+        draw_triplet_marks = bar_renderer.triplet_renderer.draw_triplet_marks
+        render_bar = bar_renderer.render_bar
+        
+        # 小節の余白（全小節で共通）
+        bar_margin = 1.5 * mm
+        repeat_margin_width = 2.0 * mm
+        
         # セクションごとに描画
         for section_index, section in enumerate(self.score.sections):
-            self.debug_print(f"Processing section: {section.name}")
-            self.debug_print(f"Section attributes: {dir(section)}")
-            self.debug_print(f"Section page_breaks: {getattr(section, 'page_breaks', None)}")
+            if self.debug_mode:
+                self.debug_print(f"Processing section: {section.name}")
+                self.debug_print(f"Section attributes: {dir(section)}")
+                self.debug_print(f"Section page_breaks: {getattr(section, 'page_breaks', None)}")
             
             # 4. セクション名を描画（空のセクション名の場合はスキップ）
             if section.name:
@@ -552,7 +677,8 @@ class Renderer:
             # 各行を描画
             for i, column in enumerate(section.columns):
                 bars_per_line = getattr(column, 'bars_per_line', self.score.bars_per_line)
-                self.debug_print(f"Section: {section.name}, Column: {i}, bars_per_line: {bars_per_line}")
+                if self.debug_mode:
+                    self.debug_print(f"Section: {section.name}, Column: {i}, bars_per_line: {bars_per_line}")
                 # 改行後の初期位置
                 if i == 0:  # 最初のカラム
                     # セクション名の下の位置を維持
@@ -565,34 +691,20 @@ class Renderer:
                 bar_width, bar_group_width, bar_group_margin = self.layout_calculator.calculate_section_layout(
                     bars_per_line, self.page_width - (2 * margin)
                 )
-                self.debug_print(f"Section: {section.name}, Column: {i}, Bar width: {bar_width}, Bar group width: {bar_group_width}")
+                if self.debug_mode:
+                    self.debug_print(f"Section: {section.name}, Column: {i}, Bar width: {bar_width}, Bar group width: {bar_group_width}")
                 bar_positions = self.layout_calculator.calculate_bar_positions(
                     bars_per_line, margin, bar_width, bar_group_width, bar_group_margin
                 )
 
-                # 三連符、コード、ボルタの有無をチェック
-                has_triplet = False  # 三連符の有無をチェック
-                has_chord = False    # コードの有無をチェック
-                has_volta = False
-
-                # 各小節の要素をチェック
-                for bar in column.bars:
-                    # 三連符のチェック（音価表示が有効な場合のみ）
-                    if self.show_length:
-                        for note in bar.notes:
-                            if hasattr(note, 'tuplet') and note.tuplet:
-                                has_triplet = True
-                                break
-                    
-                    # コードのチェック（小節内の最初の音符を探す）
-                    if bar.notes:
-                        first_note = bar.notes[0]
-                        if first_note.chord:
-                            has_chord = True
-                    
-                    # ボルタのチェック
-                    if bar.volta_number is not None:
-                        has_volta = True
+                # 三連符、コード、ボルタの有無をチェック（見つかった時点で走査を打ち切る）
+                bars = column.bars
+                # 三連符のチェック（音価表示が有効な場合のみ）
+                has_triplet = self.show_length and any(note.tuplet for bar in bars for note in bar.notes)
+                # コードのチェック（小節内の最初の音符を探す）
+                has_chord = any(bar.notes and bar.notes[0].chord for bar in bars)
+                # ボルタのチェック
+                has_volta = any(bar.volta_number is not None for bar in bars)
 
                 # 要素の重ね順：三連符 > コード > ボルタブラケット
                 triplet_y = y  # 三連符の位置
@@ -617,47 +729,55 @@ class Renderer:
                 # 弦の位置を計算
                 y_positions = self.layout_calculator.calculate_string_positions(y)
 
+                # 繰り返し記号が無い小節で音符に使える幅（行内の全小節で共通）
+                plain_usable_width = bar_width - (2 * bar_margin)
+
                 # 小節と音符を描画
                 for j, bar in enumerate(column.bars):
                     # 小節の余白を計算
-                    bar_margin = 1.5 * mm
-                    repeat_margin = 2.0 * mm if bar.is_repeat_start or bar.is_repeat_end else 0
-                    usable_width = bar_width - (2 * bar_margin) - repeat_margin
+                    repeat_margin = repeat_margin_width if bar.is_repeat_start or bar.is_repeat_end else 0
+                    usable_width = plain_usable_width - repeat_margin
                     note_x = bar_positions[j] + bar_margin + (repeat_margin if bar.is_repeat_start else 0)
 
-                    # 音符の位置を計算
-                    note_positions = self.bar_renderer._calculate_note_positions(bar, note_x, usable_width)
+                    # 音符の位置を計算（ステップ数の合計は小節ごとに1回だけ求めて使い回す）
+                    total_steps = sum(note.step for note in bar.notes)
+                    note_positions = calculate_note_positions(bar, note_x, usable_width, total_steps)
 
                     # ボルタブラケットを描画（最上段）
                     if bar.volta_number is not None:
-                        self.bar_renderer.volta_renderer.draw_volta_bracket(
+                        draw_volta_bracket(
                             canvas_obj, bar, bar_positions[j], bar_width, y_positions, volta_y
                         )
                     
                     # コードを描画（中段）
                     if bar.notes:
-                        self.debug_print(f"Checking notes in bar for chords:")
+                        if self.debug_mode:
+                            self.debug_print(f"Checking notes in bar for chords:")
+                            for i, note in enumerate(bar.notes):
+                                self.debug_print(f"Note {i}: is_rest={note.is_rest}, chord={note.chord}, is_chord_start={note.is_chord_start}")
                         # 各音符のコードを描画（明示的に指定されたコードのみ）
-                        for i, note in enumerate(bar.notes):
-                            self.debug_print(f"Note {i}: is_rest={note.is_rest}, chord={note.chord}, is_chord_start={getattr(note, 'is_chord_start', False)}")
-                            if note.chord and getattr(note, 'is_chord_start', False):
-                                self.debug_print(f"Drawing chord '{note.chord}' at position {note_positions[i]}")
-                                self.bar_renderer._draw_chord(
-                                    canvas_obj,
-                                    note_positions[i],  # 現在の音符の位置を使用
-                                    chord_y,
-                                    note.chord
-                                )
+                        # コードの開始音符だけを1回の内包表記で拾い、無ければ描画処理ごと省く
+                        chords = [
+                            (note_positions[i], note.chord)  # 現在の音符の位置を使用
+                            for i, note in enumerate(bar.notes)
+                            if note.is_chord_start and note.chord
+                        ]
+                        if chords:
+                            if self.debug_mode:
+                                for chord_x, chord in chords:
+                                    self.debug_print(f"Drawing chord '{chord}' at position {chord_x}")
+                            draw_chords(canvas_obj, chords, chord_y)
 
                     # 三連符記号を描画（下段）- 音価表示が有効な場合のみ
                     if self.show_length:
-                        triplet_ranges = self.bar_renderer.triplet_renderer.detect_triplet_ranges(bar, note_positions, canvas_obj)
+                        triplet_ranges = detect_triplet_ranges(bar, note_positions, canvas_obj)
                         if triplet_ranges:
-                            self.bar_renderer.triplet_renderer.draw_triplet_marks(canvas_obj, triplet_ranges, y_positions, triplet_y)
+                            draw_triplet_marks(canvas_obj, triplet_ranges, y_positions, triplet_y)
 
                     # 小節と音符を描画
-                    self.bar_renderer.render_bar(
-                        canvas_obj, bar, bar_positions[j], base_y, bar_width, y_positions
+                    render_bar(
+                        canvas_obj, bar, bar_positions[j], base_y, bar_width, y_positions,
+                        total_steps=total_steps
                     )
                     current_bar_count += 1  # 小節数をインクリメント
                 
@@ -666,8 +786,9 @@ class Renderer:
                 
                 # カラム描画後に改ページ判定（小節数ベース）
                 if hasattr(section, 'page_breaks') and current_bar_count in section.page_breaks:
-                    self.debug_print(f"Section: {section.name}, Current bar count: {current_bar_count}, page_breaks: {section.page_breaks}")
-                    self.debug_print(f"Should break page: {current_bar_count in section.page_breaks}")
+                    if self.debug_mode:
+                        self.debug_print(f"Section: {section.name}, Current bar count: {current_bar_count}, page_breaks: {section.page_breaks}")
+                        self.debug_print(f"Should break page: {current_bar_count in section.page_breaks}")
                     # 現在のページのページ番号を描画
                     self._draw_page_number(canvas_obj, current_page)
                     canvas_obj.showPage()
@@ -712,90 +833,99 @@ class Renderer:
     def render_text(self, output_path: str):
         """タブ譜をテキスト形式でレンダリング"""
         with open(output_path, 'w') as f:
+            # 出力はリストに溜めて最後に一度だけ書き込む
+            out = []
+            string_count = self._get_string_count()
+            
             # タイトルのみ出力（空でない場合）
             if self.score.title:
-                f.write(f"{self.score.title}\n\n")
+                out.append(f"{self.score.title}\n\n")
 
             # 各セクションを出力
             for section in self.score.sections:
                 # セクション名が空でない場合のみ表示
                 if section.name:
-                    f.write(f"[{section.name}]\n\n")
+                    out.append(f"[{section.name}]\n\n")
                 
                 # 各行（Column）を出力
                 for column in section.columns:
-                    self._render_column_text(f, column)
-                    f.write("\n")  # 行間に空行を挿入
+                    self._render_column_text(out, column, string_count)
+                    out.append("\n")  # 行間に空行を挿入
                 
-                f.write("\n")  # セクション間に空行を挿入
+                out.append("\n")  # セクション間に空行を挿入
+            
+            f.write("".join(out))
 
-    def _render_column_text(self, f, column):
-        """1行（複数の小節）をテキスト形式で出力"""
-        string_count = self._get_string_count()
+    def _render_column_text(self, out: List[str], column, string_count: int = None):
+        """1行（複数の小節）をテキスト形式でoutに追加"""
+        if string_count is None:
+            string_count = self._get_string_count()
         
         # 各小節の内容を構築
+        # 行ごとに文字列片をリストへ溜め、小節の最後に一度だけ結合する
+        row_count = string_count + 1  # +1 for chord line
         bar_contents = []
         for bar_index, bar in enumerate(column.bars):
             # コード行と弦の行を作成
-            lines = ["" for _ in range(string_count + 1)]  # +1 for chord line
+            chunks = [[] for _ in range(row_count)]
             
             # 小節の開始を示す縦線（最初の小節のみ、コード行以外）
-            for i in range(1, len(lines)):  # コード行はスキップ
-                lines[i] = "|" if bar_index == 0 else ""
-            lines[0] = " "  # コード行は空白から開始
+            if bar_index == 0:
+                for i in range(1, row_count):  # コード行はスキップ
+                    chunks[i].append("|")
+            chunks[0].append(" ")  # コード行は空白から開始
+            chord_len = 1  # コード行の長さ
+            string_len = 1 if bar_index == 0 else 0  # 1弦の行の長さ
             
             # 各音符を配置
-            current_pos = len(lines[0])  # 現在の水平位置を追跡
+            current_pos = chord_len  # 現在の水平位置を追跡
             for note in bar.notes:
                 # コードがある場合は表示
                 if note.chord:
                     # 必要なら空白を追加してコードを配置
-                    while len(lines[0]) < current_pos:
-                        lines[0] += " "
-                    lines[0] += f" {note.chord} "
+                    if chord_len < current_pos:
+                        chunks[0].append(" " * (current_pos - chord_len))
+                        chord_len = current_pos
+                    chord_str = f" {note.chord} "
+                    chunks[0].append(chord_str)
+                    chord_len += len(chord_str)
                 
-                # 音符の処理
-                if note.is_rest:
-                    # 休符の場合は全ての弦に-を追加
-                    for i in range(1, len(lines)):  # コード行はスキップ
-                        lines[i] += "-" * 4
-                else:
-                    # 通常の音符
-                    for i in range(1, len(lines)):  # コード行はスキップ
-                        if i == note.string:  # 弦番号をそのまま使用（1弦が一番上）
-                            fret_str = str(note.fret)
-                            if note.connect_next:
-                                lines[i] += f"-{fret_str}&-"  # スラーの場合は&を追加
-                            else:
-                                lines[i] += f"-{fret_str}--"
-                        else:
-                            lines[i] += "----"
+                # 連符の場合は音符の長さを2/3に（三連符の場合、最後の2文字を削除）
+                # 空白セルと音符セルは音符ごとに一度だけ作る
+                blank_str = "--" if note.tuplet else "----"
+                
+                # まず全ての弦に-を追加（休符の場合はこれだけ）
+                for i in range(1, row_count):  # コード行はスキップ
+                    chunks[i].append(blank_str)
                 
-                # 連符の場合は音符の長さを調整
-                if hasattr(note, 'tuplet') and note.tuplet:
-                    # 連符の場合は音符の長さを2/3に（三連符の場合）
-                    for i in range(1, len(lines)):
-                        if len(lines[i]) > 0:
-                            lines[i] = lines[i][:-2]  # 最後の2文字を削除
+                # 通常の音符は該当する弦のセルだけを差し替える
+                # 弦番号をそのまま使用（1弦が一番上）
+                if not note.is_rest and 1 <= note.string < row_count:
+                    fret_str = str(note.fret)
+                    if note.connect_next:
+                        note_str = f"-{fret_str}&-"  # スラーの場合は&を追加
+                    else:
+                        note_str = f"-{fret_str}--"
+                    chunks[note.string][-1] = note_str[:-2] if note.tuplet else note_str
                 
-                current_pos = len(lines[1])  # 音符の後の位置を更新
+                string_len += len(chunks[1][-1])
+                current_pos = string_len  # 音符の後の位置を更新
             
             # コード行の長さを他の行に合わせる
-            while len(lines[0]) < len(lines[1]):
-                lines[0] += " "
+            if chord_len < string_len:
+                chunks[0].append(" " * (string_len - chord_len))
             
             # 小節の終了を示す縦線（コード行以外）
-            for i in range(1, len(lines)):  # コード行はスキップ
-                lines[i] += "|"
-            lines[0] += " "  # コード行は空白で終了
+            for i in range(1, row_count):  # コード行はスキップ
+                chunks[i].append("|")
+            chunks[0].append(" ")  # コード行は空白で終了
             
-            bar_contents.append(lines)
+            bar_contents.append(["".join(row) for row in chunks])
         
-        # 全ての小節を横に並べて出力
-        for string in range(len(bar_contents[0])):
-            for bar_lines in bar_contents:
-                f.write(bar_lines[string])
-            f.write("\n")
+        # 全ての小節を横に並べて出力（zipで各行の小節片をまとめて取り出す）
+        for row in zip(*bar_contents):
+            out.extend(row)
+            out.append("\n")
 
     def render_png(self, output_path: str, dpi: int = 200):
         """タブ譜をPNGとしてレンダリング
@@ -810,6 +940,7 @@ class Renderer:
         
         try:
             # PDFをPNGに変換
+            from pdf2image import convert_from_path
             images = convert_from_path(temp_pdf, dpi=dpi)
             
             # 最初のページを保存
@@ -834,14 +965,7 @@ class Renderer:
 
     def _get_string_count(self) -> int:
         """チューニング設定から弦の数を取得"""
-        tuning_map = {
-            "guitar": 6,
-            "guitar7": 7,
-            "bass": 4,
-            "bass5": 5,
-            "ukulele": 4
-        }
-        return tuning_map.get(self.score.tuning, 6)  # デフォルトは6弦 
+        return STRING_COUNTS.get(self.score.tuning, 6)  # デフォルトは6弦
 
     def _draw_page_number(self, canvas_obj, current_page: int):
         """ページ番号を描画
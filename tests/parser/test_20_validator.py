@@ -47,6 +47,12 @@ def test_bar_duration_validation():
     with pytest.raises(ParseError, match="Bar duration is too long"):
         validator.validate_bar_duration("3/4", Fraction(4))  # 4分音符4つ
 
+    # Fractionは誤差なしで比較される（わずかな不足もエラー）
+    with pytest.raises(ParseError, match="Bar duration is too short"):
+        validator.validate_bar_duration("4/4", Fraction(4) - Fraction(1, 10000))
+    # 浮動小数点は誤差を許容する
+    assert validator.validate_bar_duration("4/4", 0.1 * 40) is True
+
 def test_chord_notation_duration():
     """和音の音価検証テスト"""
     validator = TabScriptValidator()
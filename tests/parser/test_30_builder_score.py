@@ -86,7 +86,29 @@ class TestScoreBuilder:
         
         assert len(score.sections[0].columns[0].bars) == 1
         assert len(score.sections[1].columns[0].bars) == 1
-    
+
+    def test_build_score_with_dict_sections(self):
+        """辞書形式のセクション情報からのスコア構築をテスト"""
+        builder = ScoreBuilder()
+
+        metadata = {
+            "title": "Test Song",
+            "tuning": "guitar",
+            "beat": "4/4"
+        }
+
+        sections = {
+            "Section A": [BarInfo("1-1:4 2-2:4")],
+            "Section B": [BarInfo("3-3:4 4-4:4"), BarInfo("5-5:4 6-6:4")]
+        }
+
+        score = builder.build_score(metadata, sections)
+
+        assert [s.name for s in score.sections] == ["Section A", "Section B"]
+        assert len(score.sections[0].columns[0].bars) == 1
+        assert len(score.sections[1].columns[0].bars) == 2
+        assert score.sections[1].columns[0].bars[1].notes[0].string == 5
+
     def test_build_score_with_bars_per_line(self):
         """行あたりの小節数設定をテスト"""
         builder = ScoreBuilder()
@@ -128,6 +150,16 @@ class TestScoreBuilder:
         
         assert key == "title"
         assert value == "Test Title"
+        
+        # アンダースコアを含むキー
+        key, value = builder.parse_metadata_line('$bars_per_line = "2"')
+        assert key == "bars_per_line"
+        assert value == "2"
+        
+        # 英数字とアンダースコア以外を含むキーや空のキーはエラー
+        for line in ('$foo-bar="x"', '$foo.bar="x"', '$="x"'):
+            with pytest.raises(ParseError, match="Invalid metadata format"):
+                builder.parse_metadata_line(line)
     
     def test_parse_section_header(self):
         """セクションヘッダーのパースをテスト"""
@@ -161,6 +193,30 @@ class TestScoreBuilder:
         assert len(section.columns) == 1
         assert len(section.columns[0].bars) == 2
     
+    def test_parse_lines_beat_change_after_full_line(self):
+        """1行が埋まった直後の拍子変更は次のカラムにだけ適用されることをテスト"""
+        builder = ScoreBuilder()
+        lines = [
+            '$bars_per_line="2"',
+            '[Section A]',
+            '1-1:4 2-2:4 3-3:4 4-4:4',
+            '1-1:4 2-2:4 3-3:4 4-4:4',
+            '$beat="3/4"',
+            '1-1:4 2-2:4 3-3:4',
+            '1-1:4 2-2:4 3-3:4',
+            '$beat="2/4"',
+            '1-1:4 2-2:4'
+        ]
+        
+        score = builder.parse_lines(lines)
+        
+        columns = score.sections[0].columns
+        assert [(len(c.bars), c.bars_per_line, c.beat) for c in columns] == [
+            (2, 2, '4/4'),
+            (2, 2, '3/4'),
+            (1, 2, '2/4')
+        ]
+    
     def test_build_score_with_repeat_structure(self):
         """繰り返し構造を持つスコア構築をテスト"""
         builder = ScoreBuilder()
@@ -672,4 +728,34 @@ class TestScoreBuilder:
         assert len(score.sections) == 3, "セクション数が正しくありません"
         assert score.sections[0].name == "イントロ", "イントロセクションが正しくありません"
         assert score.sections[1].name == "Aメロ", "Aメロセクションが正しくありません"
-        assert score.sections[2].name == "Bメロ", "Bメロセクションが正しくありません" 
\ No newline at end of file
+        assert score.sections[2].name == "Bメロ", "Bメロセクションが正しくありません"
+
+    def test_repeated_bar_content(self):
+        """同じ内容の小節が独立した音符を持ち、直前の弦の状態も反映されることをテスト"""
+        builder = ScoreBuilder()
+
+        metadata = {"title": "Test Song", "tuning": "guitar", "beat": "4/4"}
+        sections = [
+            {
+                "name": "Section A",
+                "bars": [
+                    BarInfo("1-0:4 (1-1 2-2):4"),
+                    BarInfo("1-0:4 (1-1 2-2):4"),
+                    BarInfo("3:4"),
+                    BarInfo("5-0:4"),
+                    BarInfo("3:4")
+                ]
+            }
+        ]
+
+        score = builder.build_score(metadata, sections)
+        bars = score.sections[0]._bars
+
+        # 同じ内容の小節は同じ音符を持つが、オブジェクトは別
+        assert bars[0].notes == bars[1].notes
+        assert bars[0].notes[0] is not bars[1].notes[0]
+        assert bars[0].notes[1].chord_notes[0] is not bars[1].notes[1].chord_notes[0]
+
+        # 弦番号を省略した小節は直前の弦を引き継ぐ
+        assert bars[2].notes[0].string == 2
+        assert bars[4].notes[0].string == 5
@@ -61,7 +61,15 @@ class TestBarBuilder:
         assert len(bar.notes[0].chord_notes) == 1  # 主音以外に1音
         assert bar.notes[0].chord_notes[0].string == 2
         assert bar.notes[0].chord_notes[0].fret == "2"
-    
+
+    def test_parse_bar_with_invalid_chord_member(self):
+        """和音の構成音に休符・弦移動を含む場合はエラー"""
+        builder = BarBuilder()
+        with pytest.raises(ParseError):
+            builder.parse_bar_line("(1-1 r):4")
+        with pytest.raises(ParseError):
+            builder.parse_bar_line("(1-1 u2):4")
+
     def test_parse_bar_with_rest(self):
         """休符を含む小節のパースをテスト"""
         builder = BarBuilder()
@@ -429,3 +429,20 @@ def test_complex_score():
     # コードの確認
     assert len(verse_b_section.columns[0].bars[0].notes) == 2  # 2つのコード（各6音）
     assert len(verse_b_section.columns[0].bars[1].notes) == 2  # 2つのコード（各6音）
+
+def test_parser_reuse():
+    """同じParserで続けてパースしても前のスコアの状態を引き継がないことを確認"""
+    parser = Parser()
+
+    # 最後の音符が5弦で終わるスコア
+    parser.parse("""
+    $section="A"
+    1-0:4 5-3:4
+    """)
+
+    # 弦番号を省略した音符は初期値の1弦になる
+    score = parser.parse("""
+    $section="A"
+    3:4
+    """)
+    assert score.sections[0].columns[0].bars[0].notes[0].string == 1